@@ -1,8 +1,11 @@
+import sqlite3
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from config import Config
 
 # Initialize extensions
@@ -11,15 +14,38 @@ migrate = Migrate()
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 
+# pysqlite only begins a transaction before a write, and not before a SAVEPOINT, so a nested
+# BudgetManager.batch() taken before any write would commit on RELEASE. Begin one first. Only here:
+# turning pysqlite's handling off altogether makes every read open a transaction, and concurrent
+# writers (the stock fetch jobs) then fail with "database is locked". Postgres needs nothing.
+def _sqlite_savepoint(conn, name):
+    dbapi_connection = conn.connection.dbapi_connection
+    if isinstance(dbapi_connection, sqlite3.Connection) and not dbapi_connection.in_transaction:
+        dbapi_connection.execute("BEGIN")
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
     # Initialize extensions with app
     db.init_app(app)
+    if not event.contains(Engine, "savepoint", _sqlite_savepoint): # once per process, like the timing events
+        event.listen(Engine, "savepoint", _sqlite_savepoint)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
 
+    # Dashboard data cache (backend picked by DASHBOARD_CACHE_BACKEND)
+    from app.services.dashboard_cache import init_cache
+    init_cache(app)
+
+    # Per-request timing: Server-Timing header, request log and slow-request SQL log (REQUEST_TIMING, SLOW_REQUEST_MS)
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    # Request latency histograms, counters and gauges for /metrics (after the timing, see init_metrics)
+    from app.metrics import init_metrics
+    init_metrics(app)
+
     # Configure login manager
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'  # Redirect to login page if not authenticated
@@ -43,10 +69,16 @@ def create_app(config_class=Config):
     from app.routes.auth import auth
     from app.routes.dashboard import dashboard
     from app.routes.errors import errors
+    from app.routes.metrics import metrics
     
     app.register_blueprint(main)
     app.register_blueprint(auth)
     app.register_blueprint(dashboard)
     app.register_blueprint(errors)
+    app.register_blueprint(metrics)
+
+    # Register CLI commands (flask goals ..., etc.)
+    from app.commands import register_commands
+    register_commands(app)
     
     return app
\ No newline at end of file
@@ -1,11 +1,90 @@
-from datetime import date, timedelta
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.models import User, Account, RecurringExpense, Spending, SavingsGoal, SavingsDeposit
+from app.models import Account, Spending, SpendingRollup, SavingsGoal, SavingsDeposit
+from app.services.account_snapshot import AccountSnapshot, build_account_snapshot
+from app.services.spending_rollup import apply_spending_deltas, record_spending
+from app.services.savings_projection import project_savings_timeline, weeks_until_all_funded
+from app.utilities.date_utils import summary_periods
 
 class BudgetManager:
     def __init__(self, db_session: Session, account_id: int):
         self.db = db_session
-        self.account = self.db.query(Account).filter_by(id=account_id).one()
+        self.account = self.db.get_one(Account, account_id) # served from the identity map when the account is already loaded
+        self._snapshot = None
+        self._batch_depth = 0
+        self._pending_rollups = None # (account_id, date) -> [amount, count] while a batch is open
+
+    @property
+    def snapshot(self) -> AccountSnapshot:
+        """SQL-aggregated totals for the account, built on first use and reused until a mutation."""
+        if self._snapshot is None:
+            self._snapshot = build_account_snapshot(self.db, self.account.id)
+        return self._snapshot
+
+    def invalidate_snapshot(self):
+        """Drop the cached snapshot so the next metric re-aggregates. Called after every write."""
+        self._snapshot = None
+
+    @contextmanager
+    def batch(self):
+        """
+        Unit of work for several mutations:
+
+            with bm.batch():
+                for item, amount in purchases:
+                    bm.make_personal_spend(item, amount)
+
+        Inside the block mutations only change the session: funds are checked against the in-memory
+        balance, which each mutation updates, and rollup updates are merged. Everything is written and
+        committed once when the block exits, or rolled back together if it raises. Batches can nest;
+        only the outermost one commits. A nested block runs in a SAVEPOINT, so if it raises and an outer
+        block catches the exception, only the nested block's changes (and its rollup updates) are undone.
+        """
+        if self._batch_depth == 0:
+            self._pending_rollups = defaultdict(lambda: [0.0, 0])
+            savepoint, pending_before = None, None
+        else:
+            savepoint = self.db.begin_nested()
+            pending_before = {key: list(delta) for key, delta in self._pending_rollups.items()}
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._pending_rollups = None
+                self.db.rollback()
+            else:
+                savepoint.rollback() # expires what changed inside, so the balance reloads as it was
+                self._pending_rollups = defaultdict(lambda: [0.0, 0], pending_before)
+            self.invalidate_snapshot()
+            raise
+        self._batch_depth -= 1
+        if savepoint is not None:
+            savepoint.commit()
+        if self._batch_depth == 0:
+            pending, self._pending_rollups = self._pending_rollups, None
+            apply_spending_deltas({key: tuple(delta) for key, delta in pending.items()})
+            self._commit()
+
+    def _commit(self):
+        """commit a mutation, or leave it to the enclosing batch()"""
+        if self._batch_depth:
+            return
+        self.db.commit()
+        self.invalidate_snapshot()
+
+    def _record_spending(self, spend_date, amount: float):
+        """add a spending to the rollups now, or merge it into the batch's single rollup update"""
+        if self._pending_rollups is None:
+            record_spending(self.account.id, spend_date, amount)
+        else:
+            self._pending_rollups[(self.account.id, spend_date)][0] += amount
+            self._pending_rollups[(self.account.id, spend_date)][1] += 1
 
     def calculate_weekly_income(self) -> float:
         if self.account.hourly_wage and self.account.hours_per_week:
@@ -13,16 +92,8 @@ class BudgetManager:
         return 0.0
 
     def calculate_weekly_expenses(self) -> float:
-        total = 0
-        expenses = self.account.expenses
-        for exp in expenses:
-            if exp.frequency == 'weekly':
-                total += exp.amount
-            elif exp.frequency == 'monthly':
-                total += exp.amount / 4  # Roughly 4 weeks in a month
-            elif exp.frequency == 'daily':
-                total += exp.amount * 7  # 7 days a week
-        return float(total)
+        # weekly = amount, monthly = amount / 4 (roughly 4 weeks in a month), daily = amount * 7. Summed in SQL by the snapshot.
+        return self.snapshot.weekly_expenses
 
     def calculate_weekly_spendable(self) -> float:
         return max(0.00, self.calculate_weekly_income() - self.calculate_weekly_expenses())
@@ -30,8 +101,9 @@ class BudgetManager:
     def week_update(self):
         available = self.calculate_weekly_spendable()
         self.account.current_balance += available
+        self.account.bump_version()
 
-        self.db.commit()
+        self._commit()
 
     def make_personal_spend(self, item_name: str, amount: float, today=None):
         '''Make a personal spend and update the account balance accordingly.'''
@@ -47,69 +119,35 @@ class BudgetManager:
             account_id=self.account.id
         )
         self.db.add(personal_spend)
+        self._record_spending(today, amount)
 
         self.account.current_balance -= amount
-        self.db.commit()
+        self.account.bump_version()
+        self._commit()
 
         return personal_spend
 
-    def weeks_to_save_all(self) -> int:
-        backup_balance = self.account.current_balance
-        backup_available_money = self.available_money
-        weeks = 0
-
-        self.available_money = 0  # reset tracker
-
-        goals = sorted(self.account.savings_goals, key=lambda g: g.id)
-
-        while True:
-            all_saved = True
-            for goal in goals:
-                saved_amount = sum(deposit.amount for deposit in goal.deposits)
-                if saved_amount < goal.cost:
-                    all_saved = False
-                    break
-
-            if all_saved:
-                break
+    def savings_timeline(self, today=None) -> list:
+        """Projected funding week for each active goal, oldest goal first. Read-only."""
+        goals = [g for g in self.snapshot.goals if not g["purchased"]] # snapshot goals are already ordered by id
+        return project_savings_timeline(goals, self.calculate_weekly_spendable(), today)
 
-            self.week_update()
-
-            for goal in goals:
-                saved_amount = sum(deposit.amount for deposit in goal.deposits)
-                needed = goal.cost - saved_amount
-                to_save = min(self.available_money, needed)
-
-                if to_save > 0:
-                    deposit = SavingsDeposit(
-                        amount=to_save,
-                        savings_goal_id=goal.id,
-                        date=date.today()
-                    )
-                    self.db.add(deposit)
-                    self.available_money -= to_save
-
-                if self.available_money <= 0:
-                    break
-
-            weeks += 1
-
-        self.db.rollback()
-
-        return weeks
+    def weeks_to_save_all(self):
+        """Weeks until every active goal is funded, or None if that can never happen."""
+        return weeks_until_all_funded(self.savings_timeline())
 
     def item_progress_report(self):
         report = []
 
-        for goal in self.account.savings_goals:
-            saved_amount = sum(deposit.amount for deposit in goal.deposits)
+        for goal in self.snapshot.goals:
+            saved_amount = goal["saved_amount"]
 
-            progress_percent = (saved_amount / goal.cost) * 100 if goal.cost else 0
+            progress_percent = (saved_amount / goal["cost"]) * 100 if goal["cost"] else 0
 
             report.append({
-                "item": goal.item,
+                "item": goal["item"],
                 "saved_amount": round(saved_amount, 2),
-                "target_amount": round(goal.cost, 2),
+                "target_amount": round(goal["cost"], 2),
                 "progress_percent": round(progress_percent, 2)
             })
 
@@ -136,13 +174,13 @@ class BudgetManager:
             date=date.today()
         )
         self.db.add(deposit)
-        self.db.commit()
+        goal.add_to_saved_total(amount)
+        self.account.bump_version()
+        self._commit()
 
     def mark_goal_as_purchased(self, goal: SavingsGoal):
 
-        total_saved = sum(deposit.amount for deposit in goal.deposits)
-
-        if total_saved < goal.cost:
+        if goal.current_amount < goal.cost:
             raise ValueError("Goal has not been fully funded yet.")
 
         spending = Spending(
@@ -152,25 +190,26 @@ class BudgetManager:
             account_id=self.account.id
         )
         self.db.add(spending)
+        self._record_spending(spending.date, spending.amount)
 
         for deposit in goal.deposits:
             self.db.delete(deposit)
         self.db.delete(goal)
+        self.account.bump_version()
 
-        self.db.commit()
+        self._commit()
 
     def calculate_net_worth(self) -> float:
         """Calculate user's total net worth"""
-        total_assets = self.account.current_balance + sum(a.value for a in self.account.assets)
-        total_investments = sum(inv.amount for inv in self.account.investments)
-        total_spending = sum(s.amount for s in self.account.spendings)
-        return total_assets + total_investments - total_spending
+        snap = self.snapshot
+        total_assets = self.account.current_balance + snap.total_assets
+        return total_assets + snap.total_investments - snap.total_spending
     
     def calculate_health_score(self) -> int:
         """Calculate financial health score (0-100)"""
         income = (self.account.hourly_wage or 0) * (self.account.hours_per_week or 0) * 4
-        spending = sum(s.amount or 0 for s in self.account.spendings)
-        savings = sum(goal.current_amount for goal in self.account.savings_goals)
+        spending = self.snapshot.total_spending
+        savings = self.snapshot.total_saved
         
         if income == 0:
             return 50  # Neutral default
@@ -181,29 +220,62 @@ class BudgetManager:
         score = 50 + (savings_rate * 40) - (spending_rate * 30)
         return int(max(0, min(score, 100)))
     
-    def get_weekly_summary(self, weeks=4) -> list:
-        """Get weekly income vs expenses for the past several weeks"""
-        today = date.today()
+    def get_spending_summary(self, periods=4, granularity="week", today=None) -> list:
+        """
+        Income vs expenses for the last `periods` days, weeks or months, oldest first.
+
+        Totals are read from the spending rollups in a single query over just the requested window
+        (monthly rows for month buckets, daily rows otherwise) and dropped into their buckets, so the
+        cost depends on the window and not on how much history the account has.
+        """
+        today = today or date.today()
+        buckets = summary_periods(granularity, periods, today)
+        if not buckets:
+            return []
+
+        rollup_type = "month" if granularity == "month" else "day" # rolling weeks don't line up with calendar weeks
+        period_totals = self.db.execute(
+            select(SpendingRollup.period_start, SpendingRollup.total)
+            .where(SpendingRollup.account_id == self.account.id,
+                   SpendingRollup.period_type == rollup_type,
+                   SpendingRollup.period_start >= buckets[0][0],
+                   SpendingRollup.period_start <= buckets[-1][1])
+        ).all()
+
+        starts = [start for start, _ in buckets]
+        expenses = [0.0] * len(buckets)
+        for start, total in period_totals:
+            # buckets are contiguous and sorted, so the bucket is the last one starting on or before this date
+            expenses[bisect_right(starts, start) - 1] += total or 0
+
+        weekly_income = self.calculate_weekly_income()
         results = []
-        
-        for i in range(weeks):
-            end = today - timedelta(days=i * 7)
-            start = end - timedelta(days=6)
-            
-            weekly_expenses = sum(
-                s.amount for s in self.account.spendings
-                if start <= s.date <= end
-            )
-            
-            weekly_income = self.calculate_weekly_income()
+        for (start, end), spent in zip(buckets, expenses):
+            if granularity == "day":
+                label = start.strftime('%b %d')
+            elif granularity == "week":
+                label = f"{start.strftime('%b %d')} - {end.strftime('%b %d')}"
+            else:
+                label = start.strftime('%b %Y')
+
+            days = (end - start).days + 1
             results.append({
-                'week': f"{start.strftime('%b %d')} - {end.strftime('%b %d')}",
-                'income': round(weekly_income, 2),
-                'expenses': round(weekly_expenses, 2)
+                'label': label,
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'income': round(weekly_income * days / 7, 2), # scale weekly income to the bucket length
+                'expenses': round(spent, 2)
             })
-        
-        return list(reversed(results))  # Make oldest week come first
-    
+
+        return results
+
+    def get_weekly_summary(self, weeks=4, today=None) -> list:
+        """Get weekly income vs expenses for the past several weeks"""
+        summary = self.get_spending_summary(weeks, "week", today)
+        for entry in summary:
+            entry['week'] = entry['label'] # older callers read the 'week' key
+        return summary
+
     def credit_payday_if_due(self, today=None):
         """Credit wages on the user's scheduled payday"""
         # If no custom date is provided, use today's date. this is for admin simulation purposes.
@@ -226,6 +298,7 @@ class BudgetManager:
         
         acc.current_balance += payment
         acc.last_pay_credit = today
-        self.db.commit()
+        acc.bump_version()
+        self._commit()
         
         return True
\ No newline at end of file
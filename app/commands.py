@@ -0,0 +1,121 @@
+import click
+from flask.cli import AppGroup
+
+# Flask CLI command groups. Run with `flask <group> <command>`, e.g. `flask goals check-totals`.
+goals_cli = AppGroup('goals', help='Savings goal maintenance commands.')
+
+@goals_cli.command('check-totals')
+@click.option('--fix', is_flag=True, help='Rebuild mismatched totals from the deposits.')
+def check_goal_totals(fix):
+    """Verify every goal's saved_total against the sum of its deposits."""
+    from app.services.deposits import reconcile_goal_totals
+
+    mismatches = reconcile_goal_totals(fix=fix)
+    for goal_id, stored, actual in mismatches:
+        click.echo(f"goal {goal_id}: stored ${stored:.2f}, deposits total ${actual:.2f}")
+
+    if not mismatches:
+        click.echo("All savings goal totals match their deposits.")
+    elif fix:
+        click.echo(f"Rebuilt {len(mismatches)} goal total(s).")
+    else:
+        click.echo(f"{len(mismatches)} goal total(s) out of sync. Re-run with --fix to rebuild them.")
+        raise SystemExit(1)
+
+rollups_cli = AppGroup('rollups', help='Spending rollup maintenance commands.')
+
+@rollups_cli.command('rebuild')
+@click.option('--account-id', type=int, default=None, help='Only rebuild this account (default: all accounts).')
+def rebuild_spending_rollups(account_id):
+    """Recompute the day/week/month spending rollups from the Spending table."""
+    from app.services.spending_rollup import rebuild_rollups
+
+    written = rebuild_rollups(account_id)
+    click.echo(f"Wrote {written} rollup row(s).")
+
+payday_cli = AppGroup('payday', help='Payroll commands.')
+
+@payday_cli.command('credit')
+@click.option('--date', 'on_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Credit as if today were this date (YYYY-MM-DD).')
+@click.option('--chunk-size', type=int, default=5000, show_default=True, help='Accounts per UPDATE/commit.')
+def credit_paydays(on_date, chunk_size):
+    """Credit wages to every account whose payday is due, catching up missed cycles."""
+    from app.services.payday import credit_all_due_paydays
+
+    stats = credit_all_due_paydays(on_date.date() if on_date else None, chunk_size)
+    click.echo(f"Scanned {stats['accounts_scanned']} account(s), credited {stats['accounts_credited']} "
+               f"({stats['cycles_credited']} cycle(s), ${stats['amount_credited']:.2f}) "
+               f"in {stats['seconds']:.2f}s ({stats['accounts_per_second']:.0f} accounts/s).")
+
+recurring_cli = AppGroup('recurring', help='Recurring expense commands.')
+
+@recurring_cli.command('process')
+@click.option('--date', 'on_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Process as if today were this date (YYYY-MM-DD).')
+@click.option('--chunk-size', type=int, default=500, show_default=True, help='Accounts per commit.')
+def process_recurring(on_date, chunk_size):
+    """Charge every due recurring expense for every account, catching up missed days."""
+    from app.services.expense_processor import process_all_recurring_expenses
+
+    stats = process_all_recurring_expenses(on_date.date() if on_date else None, chunk_size)
+    click.echo(f"Processed {stats['accounts']} account(s): {stats['charges']} charge(s) totalling ${stats['amount']:.2f}, "
+               f"{stats['failures']} skipped for insufficient funds, in {stats['seconds']:.2f}s.")
+
+spendings_cli = AppGroup('spendings', help='Spending history commands.')
+
+@spendings_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--account-id', type=int, required=True, help='Account to import the spendings into.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ofx']), default=None,
+              help='File format (default: from the extension, .ofx/.qfx are OFX).')
+@click.option('--debits-negative', is_flag=True, help='CSV amounts show money spent as negative (most bank exports).')
+@click.option('--chunk-size', type=int, default=5000, show_default=True, help='Rows per INSERT/commit.')
+def import_spendings(path, account_id, fmt, debits_negative, chunk_size):
+    """Import a CSV or OFX bank statement as spendings, skipping rows already recorded."""
+    from app.services.statement_import import import_statement
+
+    if fmt is None:
+        fmt = 'ofx' if path.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+    def report(stats):
+        click.echo(f"  {stats['rows']:,} row(s) read, {stats['imported']:,} imported", err=True)
+
+    with open(path, encoding='utf-8-sig', errors='replace', newline='') as stream:
+        try:
+            stats = import_statement(account_id, stream, fmt, debits_negative, chunk_size, progress=report)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    for error in stats['errors']:
+        click.echo(error)
+    click.echo(f"Imported {stats['imported']:,} of {stats['rows']:,} row(s) (${stats['amount']:.2f}) in {stats['seconds']:.2f}s: "
+               f"{stats['duplicates']:,} already recorded, {stats['credits']:,} credit(s) skipped, "
+               f"{stats['invalid']:,} invalid, {stats['insufficient']:,} over the balance.")
+
+ledger_cli = AppGroup('ledger', help='Account data export commands.')
+
+@ledger_cli.command('export')
+@click.argument('kind', type=click.Choice(['spendings', 'deposits', 'expenses', 'assets', 'investments']))
+@click.option('--account-id', type=int, required=True, help='Account to export.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default='csv', show_default=True)
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8', lazy=False), default='-',
+              help='File to write (default: stdout).')
+def export_ledger(kind, account_id, fmt, output):
+    """Stream one kind of an account's rows as CSV or NDJSON, in constant memory."""
+    from app import db
+    from app.models import Account
+    from app.services.ledger_export import iter_export
+
+    if db.session.get(Account, account_id) is None:
+        raise click.ClickException(f"No account with id {account_id}.")
+    for chunk in iter_export(account_id, kind, fmt):
+        output.write(chunk)
+
+def register_commands(app):
+    app.cli.add_command(goals_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(payday_cli)
+    app.cli.add_command(recurring_cli)
+    app.cli.add_command(spendings_cli)
+    app.cli.add_command(ledger_cli)
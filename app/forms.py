@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import Form, StringField, PasswordField, SubmitField, FloatField, SelectField, FormField, DateField, HiddenField, FieldList
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import Form, StringField, PasswordField, SubmitField, FloatField, SelectField, FormField, DateField, HiddenField, FieldList, BooleanField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange, Optional, InputRequired
 from app.models import User
 from datetime import date
@@ -105,6 +106,7 @@ class FinancialForm(FlaskForm):
     expenses = FieldList(FormField(_ExpenseEntry), min_entries=0)
     goals = FieldList(FormField(_GoalEntry), min_entries=0)
     spendings = FieldList(FormField(_SpendingEntry), min_entries=0)
+    spending_ids = HiddenField() # comma-separated ids of the spendings shown in the form; older ones aren't in it and are left alone on save
     assets = FieldList(FormField(_AssetEntry), min_entries=0)
     investments = FieldList(FormField(_InvestmentEntry), min_entries=0)
 
@@ -116,4 +118,10 @@ class SavingsDepositForm(FlaskForm):
     goal_id = SelectField('Savings Goal', coerce=int, validators=[DataRequired()])
     submit = SubmitField('Make Deposit')
 
-    
\ No newline at end of file
+    
+
+class StatementImportForm(FlaskForm):
+    """Upload a bank statement (CSV or OFX) to add its purchases as spendings"""
+    statement = FileField('Statement file', validators=[FileRequired(), FileAllowed(['csv', 'ofx', 'qfx'], 'CSV or OFX files only.')])
+    debits_negative = BooleanField('Money spent is shown as negative amounts')
+    submit = SubmitField('Import')
@@ -0,0 +1,149 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__all__ = [
+    "RequestTiming",
+    "init_instrumentation",
+    "current_timing",
+    "timed",
+]
+
+# Per-request timing: wall time, SQL statements and time (engine events), template render time (Flask's
+# template signals) and time spent waiting on outbound HTTP (timed("http") around the wait). Sent back as a
+# Server-Timing header, so it shows up in the browser's network panel. Requests slower than SLOW_REQUEST_MS are
+# logged as a JSON line at WARNING with their costliest SQL; with REQUEST_LOG on, every request is logged at INFO.
+
+MAX_RECORDED_STATEMENTS = 500 # distinct statements kept per request for the slow-request log
+SLOW_STATEMENTS_LOGGED = 20
+
+class RequestTiming:
+    """What one request spent its time on. Lives on flask.g for the length of the request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.durations = {"sql": 0.0, "template": 0.0} # seconds, by Server-Timing name; timed() adds others
+        self.statements = {} # sql text -> [count, seconds]
+        self._render_started = None
+
+    def record_sql(self, statement: str, seconds: float):
+        self.sql_count += 1
+        self.durations["sql"] += seconds
+        entry = self.statements.get(statement)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += seconds
+        elif len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements[statement] = [1, seconds]
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        parts = [f'sql;dur={self.durations["sql"] * 1000:.1f};desc="{self.sql_count} queries"']
+        parts += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items() if name != "sql"]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def worst_statements(self, limit: int = SLOW_STATEMENTS_LOGGED) -> list:
+        """the statements that took the most time in total, repeats (N+1 queries) counted together"""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{"sql": " ".join(sql.split()), "count": count, "ms": round(seconds * 1000, 2)}
+                for sql, (count, seconds) in ranked]
+
+def current_timing():
+    """the running request's RequestTiming, or None outside a request or with REQUEST_TIMING off"""
+    if not has_request_context():
+        return None # e.g. a stock fetch on the pool thread, or a CLI command
+    return g.get("_request_timing")
+
+@contextmanager
+def timed(name: str):
+    """add the time spent in the block to the current request's `name` timing (no-op outside a request)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = current_timing()
+        if timing is not None:
+            timing.add(name, time.perf_counter() - started)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timing() is not None:
+        conn.info["_statement_started"] = time.perf_counter() # statements on one connection run one at a time
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing()
+    started = conn.info.pop("_statement_started", None)
+    if timing is not None and started is not None:
+        timing.record_sql(statement, time.perf_counter() - started)
+
+def _before_render(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None:
+        timing._render_started = time.perf_counter()
+
+def _template_rendered(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None and timing._render_started is not None:
+        timing.add("template", time.perf_counter() - timing._render_started)
+        timing._render_started = None
+
+def _start_timing():
+    g._request_timing = RequestTiming()
+
+def _finish_timing(response):
+    timing = g.pop("_request_timing", None)
+    if timing is None:
+        return response
+    total = timing.elapsed()
+    response.headers.add("Server-Timing", timing.server_timing(total))
+
+    slow = total * 1000 >= current_app.config.get("SLOW_REQUEST_MS", 500)
+    if request.endpoint == "static" or not (slow or current_app.config.get("REQUEST_LOG", False)):
+        return response
+    user = g.get("_login_user") # already loaded by flask_login if the view used it; don't query for it here
+    record = {
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "user_id": getattr(user, "id", None),
+        "ms": round(total * 1000, 1),
+        "sql_count": timing.sql_count,
+        **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in timing.durations.items()},
+    }
+    logger = current_app.logger.getChild("requests") # goes wherever the app's log goes
+    if slow:
+        record["statements"] = timing.worst_statements()
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+    return response
+
+def init_instrumentation(app):
+    """Hook the timing into the app when REQUEST_TIMING is on. Called from create_app."""
+    if not app.config.get("REQUEST_TIMING", True):
+        return
+
+    # engine events are registered on the Engine class, once per process, so they cover every engine the
+    # app creates; statements outside a request (pool threads, CLI) are ignored by the handlers
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_template_rendered, app)
+
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    if app.config.get("REQUEST_LOG", False):
+        app.logger.getChild("requests").setLevel(logging.INFO) # one line per request, even when the app logs at WARNING
@@ -0,0 +1,292 @@
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from flask import current_app, g, request
+
+__all__ = [
+    "MetricsRegistry",
+    "REGISTRY",
+    "init_metrics",
+    "render_metrics",
+]
+
+# In-process metrics in the Prometheus text exposition format, without a client library or a push gateway.
+#
+# Every process keeps its own registry. With METRICS_DIR set (gunicorn with several workers), each worker
+# also writes a snapshot of its registry to METRICS_DIR/metrics_<pid>.json after requests (at most every
+# METRICS_FLUSH_INTERVAL seconds), and whichever worker serves /metrics adds up every snapshot in the
+# directory. Counters and histograms of workers that have exited are still counted, so totals never go
+# backwards; their gauges are dropped. Empty the directory when the app is (re)deployed.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # seconds
+INF_BUCKET = 'le="+Inf"'
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labelnames=(), function=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.function = function # read at collection time instead of being updated as things happen
+        self._values = {} # label values tuple -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list:
+        """[(label values, value)], calling the function for function-backed metrics"""
+        if self.function is not None:
+            value = self.function()
+            return [] if value is None else [((), value)]
+        with self._lock:
+            return [(key, list(value) if isinstance(value, list) else value) for key, value in self._values.items()]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0] # per-bucket counts, sum, count
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+class MetricsRegistry:
+    """Named metrics for one process. Asking for an existing name returns the metric already registered."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif kwargs.get("function") is not None:
+                metric.function = kwargs["function"] # a new app in the same process (tests) reads its own state
+            return metric
+
+    def counter(self, name: str, help: str, labelnames=(), function=None) -> Counter:
+        return self._register(Counter, name, help, labelnames, function=function)
+
+    def gauge(self, name: str, help: str, labelnames=(), function=None) -> Gauge:
+        return self._register(Gauge, name, help, labelnames, function=function)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def reset(self):
+        """zero every metric, e.g. in a freshly forked worker, whose parent's counts are in the parent's snapshot"""
+        with self._lock:
+            for metric in self._metrics.values():
+                with metric._lock:
+                    metric._values.clear()
+
+    def snapshot(self) -> dict:
+        """everything in the registry as plain JSON-able data"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "pid": os.getpid(),
+            "metrics": {
+                metric.name: {
+                    "type": metric.type,
+                    "help": metric.help,
+                    "labelnames": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", ())),
+                    "samples": [[list(key), value] for key, value in metric.samples()],
+                }
+                for metric in metrics
+            },
+        }
+
+REGISTRY = MetricsRegistry()
+_CACHES = weakref.WeakSet() # dashboard caches of the apps in this process, without keeping old ones alive
+
+def _reset_after_fork():
+    """a new worker counts from zero: its parent's counts are in the parent's snapshot"""
+    REGISTRY.reset()
+    for cache in list(_CACHES):
+        cache.reset_stats()
+
+if hasattr(os, "register_at_fork"): # POSIX only; there are no forked workers on Windows
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+REQUEST_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "Request latency by endpoint.", ("endpoint", "method"))
+REQUESTS = REGISTRY.counter("http_requests_total", "Requests by endpoint and response status.", ("endpoint", "method", "status"))
+SQL_STATEMENTS = REGISTRY.counter("db_statements_total", "SQL statements run by requests, by endpoint.", ("endpoint",))
+SQL_SECONDS = REGISTRY.counter("db_statement_seconds_total", "Time spent in SQL statements by requests, by endpoint.", ("endpoint",))
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return False # os.kill would terminate it; a Windows server runs one process, so only our own gauges count
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _merge(snapshots: list) -> dict:
+    """add up snapshots from several processes: name -> metric info with samples summed per label set"""
+    merged = {}
+    for snapshot in snapshots:
+        live = snapshot["pid"] == os.getpid() or _pid_alive(snapshot["pid"])
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] == "gauge" and not live:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for key, value in metric["samples"]:
+                key = tuple(key)
+                if key not in target["samples"]:
+                    target["samples"][key] = value
+                elif isinstance(value, list):
+                    target["samples"][key] = [a + b for a, b in zip(target["samples"][key], value)]
+                else:
+                    target["samples"][key] += value
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _exposition(merged: dict) -> str:
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for key in sorted(metric["samples"]):
+            value = metric["samples"][key]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"], value[:-2]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(names, key, [le])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(names, key, [INF_BUCKET])} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(names, key)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+def _snapshot_path(directory: str) -> str:
+    return os.path.join(directory, f"metrics_{os.getpid()}.json")
+
+def _write_snapshot(directory: str):
+    path = _snapshot_path(directory)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(tmp, path) # readers only ever see a complete file
+
+def render_metrics(app) -> str:
+    """the text exposition of this process's registry, or of every worker's with METRICS_DIR set"""
+    directory = app.config.get("METRICS_DIR")
+    if not directory:
+        return _exposition(_merge([REGISTRY.snapshot()]))
+
+    _write_snapshot(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue # removed or half-written by something else, skip it this time
+    return _exposition(_merge(snapshots))
+
+def _start_request():
+    g._metrics_started = time.perf_counter()
+
+def _observe_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or "unmatched" # not the path, so 404 scans can't blow up the label count
+    REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+
+    timing = g.get("_request_timing") # from app.instrumentation, when REQUEST_TIMING is on
+    if timing is not None:
+        SQL_STATEMENTS.inc(timing.sql_count, endpoint=endpoint)
+        SQL_SECONDS.inc(timing.durations["sql"], endpoint=endpoint)
+
+    directory = current_app.config.get("METRICS_DIR")
+    if directory:
+        now = time.monotonic()
+        state = current_app.extensions["metrics"]
+        if now - state["flushed_at"] >= current_app.config.get("METRICS_FLUSH_INTERVAL", 1.0):
+            state["flushed_at"] = now
+            _write_snapshot(directory)
+    return response
+
+def _pool_stat(name: str):
+    from app import db # Has to be here to avoid circular import.
+
+    stat = getattr(db.engine.pool, name, None) # QueuePool has these, the single-connection test pools don't
+    return max(stat(), 0) if callable(stat) else None # overflow counts up from -size until the pool is full
+
+def init_metrics(app):
+    """
+    Record request metrics and register the app's gauges. Called from create_app after init_instrumentation,
+    so this after_request hook runs first and still finds the request's SQL timing.
+    """
+    directory = app.config.get("METRICS_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    app.extensions["metrics"] = {"flushed_at": 0.0}
+
+    cache = app.extensions.get("dashboard_cache")
+    if cache is not None:
+        _CACHES.add(cache) # reset after a fork along with the registry
+    REGISTRY.counter("dashboard_cache_hits_total", "Dashboard data served from the cache.",
+                     function=lambda: cache.hits if cache else None)
+    REGISTRY.counter("dashboard_cache_misses_total", "Dashboard data built because it wasn't cached.",
+                     function=lambda: cache.misses if cache else None)
+    REGISTRY.gauge("db_pool_size", "Connections the pool keeps open.", function=lambda: _pool_stat("size"))
+    REGISTRY.gauge("db_pool_checked_out", "Connections in use.", function=lambda: _pool_stat("checkedout"))
+    REGISTRY.gauge("db_pool_overflow", "Connections open beyond the pool size.", function=lambda: _pool_stat("overflow"))
+
+    app.before_request(_start_request)
+    app.after_request(_observe_request)
@@ -1,4 +1,6 @@
 from datetime import date
+from sqlalchemy import case
+from sqlalchemy.sql.expression import ColumnElement
 from app import db
 from flask_login import UserMixin
 
@@ -21,18 +23,26 @@ class Account(db.Model):
     pay_frequency = db.Column(db.String(10), default="weekly")  # weekly | biweekly
     pay_day_of_week = db.Column(db.Integer, default=4)  # 0=Mon through 6=Sun (Friday default)
     last_pay_credit = db.Column(db.Date, nullable=True)  # Track when last credited
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Bumped by every write to the account or its rows, keys the dashboard cache
 
     expenses = db.relationship('RecurringExpense', backref='account', lazy=True, cascade='all, delete-orphan')
     spendings = db.relationship('Spending', backref='account', lazy=True, cascade='all, delete-orphan')
     savings_goals = db.relationship('SavingsGoal', backref='account', lazy=True, cascade='all, delete-orphan')
     investments = db.relationship('Investment', backref='account', lazy=True, cascade='all, delete-orphan')
     assets = db.relationship('Asset', backref='account', lazy=True, cascade='all, delete-orphan')
+    spending_rollups = db.relationship('SpendingRollup', lazy=True, cascade='all, delete-orphan')
+
+    # Mark the account as changed so cached dashboard data for the old version is no longer used.
+    # Flushed as "version = version + 1" rather than a value computed here, so two concurrent writers can't both land on the same version.
+    def bump_version(self):
+        self.version = Account.version + 1
 
 class RecurringExpense(db.Model): # This is a class to store recurring expenses like rent, subscriptions, etc.
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     frequency = db.Column(db.String(20), nullable=False)  # daily, weekly, monthly. Should probably be using an enum.
+    processed_through = db.Column(db.Date, nullable=True) # Last day the recurring processor has charged this expense up to (watermark)
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
 
 class Spending(db.Model): # Tracks purchases made by the user that are not scheduled recurring expenses.
@@ -41,6 +51,22 @@ class Spending(db.Model): # Tracks purchases made by the user that are not sched
     amount = db.Column(db.Float, nullable=False)
     date = db.Column(db.Date, default=date.today)
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+    # Set on charges made by the recurring expense processor: which expense, and the start of the day/week/month it covers.
+    # The unique index means an expense can only be charged once per period, even if it gets renamed.
+    recurring_expense_id = db.Column(db.Integer, db.ForeignKey('recurring_expense.id', ondelete='SET NULL'), nullable=True)
+    recurring_period_start = db.Column(db.Date, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_spending_recurring_period', 'recurring_expense_id', 'recurring_period_start', unique=True),
+        db.Index('ix_spending_account_date_id', 'account_id', 'date', 'id'), # keyset pages of an account's history (spending_history.py)
+    )
+
+class SpendingRollup(db.Model): # Pre-summed spending per account per day/week/month, maintained by app/services/spending_rollup.py
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), primary_key=True)
+    period_type = db.Column(db.String(5), primary_key=True) # day, week (starts Monday) or month
+    period_start = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    count = db.Column(db.Integer, nullable=False, default=0)
 
 class SavingsGoal(db.Model): # Let the user set a savings goal for a specific item.
     id = db.Column(db.Integer, primary_key=True)
@@ -49,15 +75,25 @@ class SavingsGoal(db.Model): # Let the user set a savings goal for a specific it
     account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
     purchased = db.Column(db.Boolean, default=False) # Track if the goal has been purchased
     purchase_date = db.Column(db.Date, nullable=True) # Track when the goal was purchased
+    saved_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0') # Running total of deposits, kept in sync by the deposit services
+
+    # Add a deposit to (or, negative, take one off) the running total. Flushed as "saved_total = saved_total + amount",
+    # like Account.bump_version, so two concurrent deposits both count; never goes below zero.
+    # The attribute is reloaded from the database the next time it's read after the flush.
+    def add_to_saved_total(self, amount: float):
+        pending = self.__dict__.get("saved_total") # a second deposit before the flush builds on the first one's expression
+        new_total = (pending if isinstance(pending, ColumnElement) else SavingsGoal.saved_total) + amount
+        self.saved_total = case((new_total < 0, 0.0), else_=new_total)
 
     # This is a relationship to the SavingsDeposit class. It allows us to access all deposits made towards this goal.
     # cascade="all, delete-orphan" means that if a SavingsGoal is deleted, all its associated SavingsDeposits will also be deleted.
     deposits = db.relationship('SavingsDeposit', backref='goal', lazy=True, cascade="all, delete-orphan")
     
-    # This is a property that calculates the current amount saved towards the goal by summing up all deposits.
+    # This is a property that returns the current amount saved towards the goal.
+    # It reads the stored running total instead of summing every deposit, so it doesn't load the deposits at all.
     @property
     def current_amount(self):
-        return sum(deposit.amount for deposit in self.deposits)
+        return self.saved_total or 0.0
     
     # This is a property that checks if the goal is funded. It returns True if the current amount is greater than or equal to the cost of the item.
     @property
@@ -87,4 +123,14 @@ class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     value = db.Column(db.Float, nullable=False)
-    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
\ No newline at end of file
+    account_id = db.Column(db.Integer, db.ForeignKey('account.id'), nullable=False)
+
+class StockSymbol(db.Model): # One row per ticker in the shared price store, shared by every user and worker
+    symbol = db.Column(db.String(20), primary_key=True) # upper-cased ticker, e.g. AAPL
+    fetched_at = db.Column(db.DateTime, nullable=True) # last successful fetch from Yahoo, for the TTL check
+    last_bar_date = db.Column(db.Date, nullable=True) # newest stored bar; the next fetch only asks Yahoo for bars after it. Null = fetch full history
+
+class StockPrice(db.Model): # Weekly closing prices from Yahoo Finance, maintained by app/services/stock_prices.py
+    symbol = db.Column(db.String(20), db.ForeignKey('stock_symbol.symbol'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    close = db.Column(db.Float, nullable=False)
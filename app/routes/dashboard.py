@@ -1,25 +1,31 @@
-from datetime import date, timedelta
-import requests
+import io
+from datetime import date
 
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for, flash, session, current_app
+from flask import Blueprint, Response, render_template, jsonify, request, redirect, url_for, flash, session, current_app, stream_with_context
 from flask_login import login_required, current_user
 
-# ---- UI-branch models & helpers ----
-from app.models import Account, Spending, SavingsGoal, Investment, Asset
-from app.calculations import BudgetManager
-
 # ---- Form-branch services & forms ----
-from app.forms import FinancialForm, SavingsDepositForm
+from app.forms import FinancialForm, SavingsDepositForm, StatementImportForm
 from app.services import account as account_svc
 from app.services import deposits as deposit_svc
 from app.services import dashboard_data as dashboard_svc
 from app.services import expense_processor as expense_svc
+from app.services import forecast as forecast_svc
+from app.services import ledger_export as export_svc
+from app.services import registry
+from app.services import spending_history as history_svc
+from app.services import statement_import as import_svc
+from app.services import stock_prices as stock_svc
+from app.services.savings_projection import weeks_until_all_funded
 from app.utilities.date_utils import get_effective_date
 from app.utilities.form_utils import flash_form_errors
 from app import db
 
 dashboard = Blueprint("dashboard", __name__)
 
+MAX_SUMMARY_PERIODS = 3660 # ten years of daily buckets
+MAX_STOCK_SYMBOLS = 25
+
 # ---------------------
 #  MAIN DASHBOARD VIEW
 # ---------------------
@@ -30,10 +36,10 @@ def view():
     effective_date = get_effective_date()
 
     # Get the account
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
 
     # Process payday credit
-    bm = BudgetManager(db.session, account.id)
+    bm = registry.get_budget_manager(account.id)
     credited = bm.credit_payday_if_due(effective_date)
     if credited:
         flash(f"Payday! Your wages have been credited to your account.", "success")
@@ -41,18 +47,22 @@ def view():
     # Process any recurring expenses that should be added to spending records today
     expense_svc.process_recurring_expenses(account, effective_date)
 
+    # Load everything the page renders in a fixed number of queries (after the processors, since their commits expire it)
+    account = account_svc.load_account_for_dashboard(current_user.id)
+
     # Get dashboard data using the service
-    data = dashboard_svc.get_dashboard_data(account)
+    data = dashboard_svc.get_dashboard_data(account, effective_date)
     
     # Set up forms
-    finance_form = FinancialForm(obj=account)
+    finance_form = FinancialForm(data=account_svc.financial_form_data(account))
     deposit_form = SavingsDepositForm()
+    import_form = StatementImportForm()
     account_svc.prefill_financial_form(finance_form, account)
     
     if data['savings_goals']:
         deposit_form.goal_id.choices = [
-            (g.id, f"{g.item} - ${g.current_amount:.2f} / ${g.cost:.2f} ({g.progress_percent:.0f}%)")
-            for g in data['savings_goals'] if not g.is_funded
+            (g['id'], f"{g['item']} - ${g['current_amount']:.2f} / ${g['cost']:.2f} ({g['progress_percent']:.0f}%)")
+            for g in data['savings_goals'] if not g['is_funded']
         ]
     
     return render_template(
@@ -62,6 +72,7 @@ def view():
         # Modal data
         form=finance_form,
         deposit_form=deposit_form,
+        import_form=import_form,
         account_exists=bool(account.expenses or account.savings_goals),
         today=effective_date.strftime("%Y-%m-%d"),
         simulated_date=effective_date.strftime("%B-%d-%Y"),
@@ -80,7 +91,7 @@ def save_financial():
         flash_form_errors(form)
         return redirect(url_for(".view"))
 
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
     
     account.current_balance = form.current_balance.data
     account.min_balance_goal = form.min_balance_goal.data
@@ -102,7 +113,7 @@ def save_deposit():
     form = SavingsDepositForm()
 
     # get the account and populate the choices before validation or it will fail
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
     form.goal_id.choices = [(g.id, g.item) for g in account.savings_goals]
 
     if not form.validate_on_submit():
@@ -120,82 +131,190 @@ def save_deposit():
 
     return redirect(url_for(".view"))
 
+@dashboard.post("/dashboard/deposits/<int:deposit_id>/delete")
+@login_required
+def delete_deposit(deposit_id):
+    account = registry.get_account(current_user.id)
+
+    try:
+        deposit_svc.delete_deposit(deposit_id, account.id)
+        flash("Deposit removed and refunded to your balance.", "success")
+    except ValueError as e:
+        flash(str(e), "danger")
+
+    return redirect(url_for(".view"))
+
+@dashboard.post("/dashboard/import")
+@login_required
+def import_statement():
+    form = StatementImportForm()
+    if not form.validate_on_submit():
+        flash_form_errors(form)
+        return redirect(url_for(".view"))
+
+    account = registry.get_account(current_user.id)
+    upload = form.statement.data
+    fmt = 'ofx' if upload.filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+    # read the upload as a text stream, so the statement is parsed a row at a time rather than loaded whole
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        stats = import_svc.import_statement(account.id, stream, fmt, form.debits_negative.data)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for(".view"))
+    registry.invalidate_account(account.id)
+
+    flash(f"Imported {stats['imported']} spending(s) totalling ${stats['amount']:.2f}. "
+          f"{stats['duplicates']} already recorded and {stats['credits']} credit(s) skipped.", "success")
+    # like the recurring expense processor: show the first problem and a count
+    if stats['errors']:
+        flash(stats['errors'][0], "danger")
+    skipped = stats['invalid'] + stats['insufficient']
+    if skipped > 1:
+        flash(f"{skipped - 1} more row(s) were skipped as invalid or over your balance.", "danger")
+    return redirect(url_for(".view"))
+
 # ---------------------
 #  API ENDPOINTS
 # ---------------------
 @dashboard.route('/stock-history-yahoo')
 @login_required
 def yahoo_stock_history():
-    """Use Yahoo Finance instead of Alpha Vantage"""
+    """Weekly closes from Yahoo Finance, served from the shared price store (see services/stock_prices.py)"""
+    # ?symbol=AAPL&symbol=MSFT&range=1m|6m|5y (default 6m)
     symbols = request.args.getlist('symbol')
-    
-    # Add caching logic to reduce API calls
-    cache_key = f"yahoo_stock_data_{'_'.join(sorted(symbols))}"
-    cached_data = session.get(cache_key)
-    
-    # Return cached data if available and not expired (cache for 7 days)
-    if cached_data and cached_data.get('timestamp', 0) > (date.today().toordinal() - 7):
-        return jsonify(cached_data['data'])
-    
-    all_data = {}
+    window = request.args.get('range', '6m')
+    if len(symbols) > MAX_STOCK_SYMBOLS:
+        return jsonify({"error": f"At most {MAX_STOCK_SYMBOLS} symbols per request"}), 400
+
     try:
-        for symbol in symbols:
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            params = {
-                'interval': '1wk',  # weekly data
-                'range': '6mo'      # 6 months
-            }
-            
-            r = requests.get(url, params=params, headers=headers, timeout=10)
-            data = r.json()
-            
-            # Parse Yahoo Finance data format
-            if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
-                result = data['chart']['result'][0]
-                timestamps = result['timestamp']
-                quotes = result['indicators']['quote'][0]
-                
-                history = []
-                for i, ts in enumerate(timestamps):
-                    if 'close' in quotes and quotes['close'][i] is not None:
-                        # Convert timestamp to date format
-                        dt = date.fromtimestamp(ts)
-                        history.append({
-                            'date': dt.isoformat(),
-                            'close': quotes['close'][i]
-                        })
-                
-                all_data[symbol] = history
-            else:
-                all_data[f'{symbol}_error'] = "No data available from Yahoo Finance"
-                
-        # Cache the results
-        session[cache_key] = {
-            'timestamp': date.today().toordinal(),
-            'data': all_data
-        }
-                
-    except Exception as e:
-        all_data['error'] = f"Failed to fetch data: {str(e)}"
-        
-    return jsonify(all_data)
+        data, stale = stock_svc.get_price_history(symbols, window)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify(data)
+    if stale:
+        response.headers["X-Prices-Stale"] = "true" # stored prices were served, a refresh is on its way
+    return response
 
 @dashboard.route('/weekly-summary')
 @login_required
 def weekly_summary():
-    account = account_svc.get_or_create_account(current_user.id)
-        
-    bm = BudgetManager(db.session, account.id)
-    data = bm.get_weekly_summary(4)
+    account = registry.get_account(current_user.id)
+
+    # ?periods=52&granularity=week|day|month. "weeks" is still accepted for older callers.
+    periods = request.args.get('periods', request.args.get('weeks', 4), type=int)
+    granularity = request.args.get('granularity', 'week')
+    if not periods or not 1 <= periods <= MAX_SUMMARY_PERIODS:
+        return jsonify({"error": f"periods must be between 1 and {MAX_SUMMARY_PERIODS}"}), 400
+
+    bm = registry.get_budget_manager(account.id)
+    try:
+        data = bm.get_spending_summary(periods, granularity, get_effective_date())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(data)
 
+@dashboard.route('/api/savings-timeline')
+@login_required
+def savings_timeline_api():
+    account = registry.get_account(current_user.id)
+
+    bm = registry.get_budget_manager(account.id)
+    timeline = bm.savings_timeline(get_effective_date())
+
+    return jsonify({
+        "weekly_spendable": round(bm.calculate_weekly_spendable(), 2),
+        "weeks_to_save_all": weeks_until_all_funded(timeline), # null when some goal can never be funded
+        "goals": timeline
+    })
+
+@dashboard.route('/api/forecast')
+@login_required
+def forecast_api():
+    account = registry.get_account(current_user.id)
+
+    years = request.args.get('years', 1, type=int)
+    scenarios = request.args.get('scenarios', 2000, type=int)
+    seed = request.args.get('seed', None, type=int)
+
+    try:
+        data = forecast_svc.forecast_balance(account, years, scenarios, seed, get_effective_date())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(data)
+
+@dashboard.route('/api/spendings')
+@login_required
+def spendings_api():
+    """
+    The account's spendings, newest first, a page at a time.
+        ?before=<cursor from the previous page's "next">&limit=50
+        &from=YYYY-MM-DD&to=YYYY-MM-DD&min_amount=&max_amount=&q=<item prefix>&recurring=true|false
+    """
+    account = registry.get_account(current_user.id)
+
+    limit = request.args.get('limit', history_svc.SPENDINGS_PAGE_SIZE, type=int)
+    if not limit or not 1 <= limit <= history_svc.MAX_SPENDINGS_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {history_svc.MAX_SPENDINGS_PAGE_SIZE}"}), 400
+
+    try:
+        filters = _spending_filters(request.args)
+        page = history_svc.spending_page(account.id, request.args.get('before') or None, limit, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for spend in page['spendings']:
+        spend['date'] = spend['date'].isoformat() if spend['date'] else None
+    return jsonify(page)
+
+def _spending_filters(args) -> dict:
+    """spending_page filters from the query string. Raises ValueError with a message for the client."""
+    filters = {}
+    for arg, key in (('from', 'start'), ('to', 'end')):
+        if args.get(arg):
+            try:
+                filters[key] = date.fromisoformat(args[arg])
+            except ValueError:
+                raise ValueError(f"{arg} must be a date (YYYY-MM-DD)") from None
+    for key in ('min_amount', 'max_amount'):
+        if args.get(key):
+            try:
+                filters[key] = float(args[key])
+            except ValueError:
+                raise ValueError(f"{key} must be a number") from None
+    if args.get('q'):
+        filters['text'] = args['q']
+    if args.get('recurring'):
+        if args['recurring'] not in ('true', 'false'):
+            raise ValueError("recurring must be true or false")
+        filters['recurring'] = args['recurring'] == 'true'
+    return filters
+
+@dashboard.route('/api/export/<kind>')
+@login_required
+def export_api(kind):
+    """
+    Download the account's spendings, deposits, expenses, assets or investments.
+        ?format=csv (default) | ndjson
+    """
+    account = registry.get_account(current_user.id)
+    fmt = request.args.get('format', 'csv')
+
+    try:
+        chunks = export_svc.iter_export(account.id, kind, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # streamed as the rows are read, so the first bytes go out straight away and nothing is held in memory
+    filename = f"{kind}-{date.today().isoformat()}.{fmt}"
+    return Response(stream_with_context(chunks), mimetype=export_svc.EXPORT_FORMATS[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @dashboard.route('/api/max-spend')
 @login_required
 def max_spend_api():
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
     
     # return current balance as max spendable amount
     available = account.current_balance
@@ -205,7 +324,7 @@ def max_spend_api():
 @dashboard.route('/api/max-deposit')
 @login_required
 def max_deposit_api():
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
     
     # maximum deposit is total available balance
     available = account.current_balance
@@ -259,8 +378,9 @@ def reset_pay_credit():
         return redirect(url_for('.view'))
         
     # Get account and reset last_pay_credit
-    account = account_svc.get_or_create_account(current_user.id)
+    account = registry.get_account(current_user.id)
     account.last_pay_credit = None
+    account.bump_version()
     db.session.commit()
     
     flash("Last pay credit date has been reset", "success")
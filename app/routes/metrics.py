@@ -0,0 +1,19 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user
+
+from app.metrics import render_metrics
+
+metrics = Blueprint("metrics", __name__)
+
+@metrics.route("/metrics")
+def exposition():
+    # Only the admin, or a scraper sending "Authorization: Bearer <METRICS_TOKEN>" (scrapers can't log in)
+    token = current_app.config.get('METRICS_TOKEN')
+    is_scraper = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+    is_admin = current_user.is_authenticated and current_user.email == current_app.config['ADMIN_EMAIL']
+    if not (is_scraper or is_admin):
+        abort(403)
+
+    return Response(render_metrics(current_app), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,12 +1,19 @@
 # app/services/account.py
+from collections import defaultdict
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models import (Account, RecurringExpense, SavingsGoal, Spending, Asset, Investment)
+from app.models import (Account, RecurringExpense, SavingsGoal, SavingsDeposit, Spending, Asset, Investment)
 from flask import flash
-from app.calculations import BudgetManager
+from app.services.registry import get_budget_manager, invalidate_account
+from app.services.spending_history import spending_page
+from app.services.spending_rollup import apply_spending_deltas
 from app.utilities.date_utils import get_effective_date
 
 __all__ = [ # Define the public API of this module (what will be imported when using 'from module import *')
+    "financial_form_data",
     "get_or_create_account",
+    "load_account_for_dashboard",
     "prefill_financial_form",
     "sync_financial_form",
 ]
@@ -25,6 +32,41 @@ def get_or_create_account(user_id: int) -> Account:
         db.session.flush()          # flush so row gets primary key without committing. Need this for FKs and for form to work.
     return account
 
+# Every collection the dashboard view, get_dashboard_data, prefill_financial_form and the template walk.
+# selectinload fetches each one with a single "WHERE account_id IN (...)" query, so the whole aggregate
+# loads in a fixed number of round trips instead of one lazy query per collection.
+# Goal deposits aren't included: current_amount reads SavingsGoal.saved_total, so nothing walks them.
+# Neither are spendings: only the most recent page is shown, and that's read with its own keyset query.
+DASHBOARD_LOAD_OPTIONS = (
+    selectinload(Account.expenses),
+    selectinload(Account.savings_goals),
+    selectinload(Account.assets),
+    selectinload(Account.investments),
+)
+
+def load_account_for_dashboard(user_id: int) -> Account:
+    """
+    return the user's Account with everything the dashboard renders already loaded.
+
+    populate_existing refreshes an Account that is already in the session (e.g. one the payday or
+    recurring processors just committed), so its collections are reloaded eagerly rather than lazily.
+    """
+    account = (Account.query
+               .filter_by(user_id=user_id)
+               .options(*DASHBOARD_LOAD_OPTIONS)
+               .execution_options(populate_existing=True)
+               .first())
+    return account or get_or_create_account(user_id)
+
+# FinancialForm's scalar fields. The form is built from these rather than obj=account, which would make WTForms
+# walk every collection (the whole spending history included) only for prefill_financial_form to replace them.
+FINANCIAL_FORM_FIELDS = ("current_balance", "min_balance_goal", "hourly_wage", "hours_per_week",
+                         "pay_frequency", "pay_day_of_week")
+
+def financial_form_data(account) -> dict:
+    """the account's values for FinancialForm(data=...); the FieldLists are filled by prefill_financial_form"""
+    return {name: getattr(account, name) for name in FINANCIAL_FORM_FIELDS}
+
 def prefill_financial_form(form, account):
     """copy model data to WTForm so it shows existing data."""
     # clear existing data in each FieldList (subform) inside the main form
@@ -46,12 +88,15 @@ def prefill_financial_form(form, account):
         row.form.item.data = goal.item
         row.form.cost.data = goal.cost
 
-    for spend in account.spendings:
+    # only the most recent spendings are editable; their ids go in a hidden field so the sync knows the window
+    recent = spending_page(account.id)['spendings']
+    for spend in recent:
         row = form.spendings.append_entry()
-        row.form.id.data = spend.id
-        row.form.item.data = spend.item
-        row.form.amount.data = spend.amount
-        row.form.date.data = spend.date
+        row.form.id.data = spend['id']
+        row.form.item.data = spend['item']
+        row.form.amount.data = spend['amount']
+        row.form.date.data = spend['date']
+    form.spending_ids.data = ",".join(str(spend['id']) for spend in recent)
 
     for asset in account.assets:
         row = form.assets.append_entry()
@@ -66,70 +111,98 @@ def prefill_financial_form(form, account):
         row.form.amount.data = inv.amount
 
 
-def _upsert_collection(rows, model_cls, account: Account):
+def _upsert_collection(rows, model_cls, account: Account, window=None):
     """
     private helper performing list-diff synchronisation (create, update, delete):
         UPDATE: Existing records (with an id) are updated with new values
         INSERT: New records (without an id) are created
         DELETE: Records in the database that aren't in the incoming rows are removed
 
-    this function tracks which rows are seen and deletes any that aren't in the incoming data.
+    the account's existing rows are loaded once into an id-keyed dict, the three sets are worked out with
+    set operations, and each is applied with one bulk statement, so the number of queries doesn't grow
+    with the number of rows. ids that don't belong to this account are ignored (ownership check).
 
     Args:
         rows - list of dictionaries coming from WTForms FieldList
         model_cls - SQLAlch model class to write to (e.g. RecurringExpense)
         account - parent Account instance (used for FK & filtering)
+        window - ids the form was showing, when it only showed some of the rows (spendings). Only rows
+                 in the window can be deleted; everything outside it is left untouched.
     """
-    seen = [] # list of IDs that are seen in the incoming data
+    candidates = {} # id -> payload for every submitted row with an id
+    new_rows = []
     for row in rows:
-        row_id = row.get("id")
+        row_id = (row.get("id") or "").strip()
         payload = {k: v for k, v in row.items() # payload is a dict containing only the model columns (attributes to be stored in the DB), discarding the id and csrf_token
                    if k not in ("id", "csrf_token")}
-
-        # special handling for new spending records
-        if model_cls is Spending and not row_id:
-            try:
-                # process through BudgetManager to validate funds and reduce balance
-                bm = BudgetManager(db.session, account.id)
-                selected_date = payload.get("date") or get_effective_date()
-                
-                spend = bm.make_personal_spend(
-                    payload["item"],
-                    float(payload["amount"]),
-                    selected_date
-                )
-                # add to seen list to prevent deletion
-                seen.append(spend.id)
-                continue  # skip normal insertion path
-            except ValueError as e:
-                flash(str(e), "danger")
-                continue  # skip this row altogether
-
-        # update existing records
-        if row_id and row_id.strip(): # check if exists and is not empty
-            item = model_cls.query.get(int(row_id)) # fetch existing record by id
-            if item and item.account_id == account.id: # verify item exists, belongs to current account, update each attribute with values from payload
-                for k, v in payload.items():
-                    setattr(item, k, v) # assigns obj.name = value dynamically
-                seen.append(item.id) # add to seen list to prevent deletion
-        # insert new records
-        else:
-            item = model_cls(**payload) # create new instance of model with payload data (** to unpack dict)
-            item.account = account # set relationship to account
-            db.session.add(item) # add new item to DB session
-            db.session.flush() # flush to get ID for new record (without commiting)
-            seen.append(item.id) # add to seen list to prevent deletion
-
-    # delete orphan records
-    for item in model_cls.query.filter_by(account_id=account.id):
-        if item.id not in seen:
-            db.session.delete(item)
-
+        if not row_id:
+            new_rows.append(payload)
+        elif row_id.isdigit():
+            candidates[int(row_id)] = payload
+
+    table = model_cls.__table__
+    query = select(table).where(table.c.account_id == account.id)
+    if window is not None:
+        query = query.where(table.c.id.in_(window | candidates.keys()))
+    existing = {row.id: row for row in db.session.execute(query)}
+
+    # rows that already exist (and belong to this account)
+    submitted = {row_id: payload for row_id, payload in candidates.items() if row_id in existing}
+
+    to_delete = (existing.keys() if window is None else existing.keys() & window) - submitted.keys()
+    to_update = {row_id: payload for row_id, payload in submitted.items() # skip rows the user didn't change
+                 if any(getattr(existing[row_id], k) != v for k, v in payload.items())}
+
+    if model_cls is Spending:
+        # move updated and deleted amounts out of the rollups and the new values back in, as one batch
+        deltas = defaultdict(lambda: [0.0, 0])
+        for row_id in to_delete | to_update.keys():
+            old = existing[row_id]
+            deltas[(account.id, old.date)][0] -= old.amount # an undated row was never in the rollups, so it's skipped
+            deltas[(account.id, old.date)][1] -= 1
+        for payload in to_update.values():
+            deltas[(account.id, payload["date"])][0] += payload["amount"]
+            deltas[(account.id, payload["date"])][1] += 1
+        apply_spending_deltas({key: tuple(delta) for key, delta in deltas.items()})
+
+    if to_update:
+        db.session.execute(update(model_cls), [{"id": row_id, **payload} for row_id, payload in to_update.items()])
+
+    if to_delete:
+        if model_cls is SavingsGoal: # bulk deletes skip the ORM cascade, so remove the goals' deposits first
+            db.session.execute(delete(SavingsDeposit).where(SavingsDeposit.savings_goal_id.in_(to_delete)))
+        if model_cls is RecurringExpense:
+            # the FK's ON DELETE SET NULL isn't enforced on SQLite (no PRAGMA foreign_keys), so unlink the charges
+            # here; left pointing at a reused id they'd mark a new expense's periods as already charged
+            db.session.execute(update(Spending).where(Spending.recurring_expense_id.in_(to_delete))
+                               .values(recurring_expense_id=None))
+        db.session.execute(delete(model_cls).where(model_cls.id.in_(to_delete)))
+
+    if model_cls is Spending:
+        # new spendings go through BudgetManager to validate funds against the running balance and reduce it.
+        # One batch, so they're written and committed together instead of one commit per spending.
+        bm = get_budget_manager(account.id)
+        with bm.batch():
+            for payload in new_rows:
+                try:
+                    bm.make_personal_spend(payload["item"], float(payload["amount"]),
+                                           payload.get("date") or get_effective_date())
+                except ValueError as e:
+                    flash(str(e), "danger") # skip this row altogether
+    elif new_rows:
+        db.session.execute(insert(model_cls), [{**payload, "account_id": account.id} for payload in new_rows])
+
+
+def _spending_window(raw) -> set:
+    """ids from the form's spending_ids hidden field ('' or missing means no existing spendings were shown)"""
+    return {int(part) for part in (raw or "").split(",") if part.strip().isdigit()}
 
 def sync_financial_form(form, account: Account) -> None:
     """persist all FieldLists in one go."""
     _upsert_collection(form.expenses.data, RecurringExpense, account)
     _upsert_collection(form.goals.data, SavingsGoal, account)
-    _upsert_collection(form.spendings.data, Spending, account)
+    _upsert_collection(form.spendings.data, Spending, account, window=_spending_window(form.spending_ids.data))
     _upsert_collection(form.assets.data, Asset, account)
     _upsert_collection(form.investments.data, Investment, account)
+    account.bump_version()
+    invalidate_account(account.id)
@@ -0,0 +1,66 @@
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.models import Asset, Investment, RecurringExpense, SavingsGoal, SpendingRollup
+
+class AccountSnapshot:
+    """
+    Aggregate totals for one account, computed with SQL SUM/GROUP BY instead of
+    loading every child row through the lazy relationships.
+
+    Two round trips: one for all the scalar totals and one for the goals' saved totals.
+    The snapshot is a point-in-time copy, so rebuild it after changing the account's rows.
+    """
+
+    def __init__(self, total_assets, total_investments, total_spending, spending_count,
+                 weekly_expenses, goals):
+        self.total_assets = float(total_assets)
+        self.total_investments = float(total_investments)
+        self.total_spending = float(total_spending)
+        self.spending_count = int(spending_count)
+        self.weekly_expenses = float(weekly_expenses)
+        self.goals = goals # list of dicts: id, item, cost, purchased, saved_amount
+
+    @property
+    def total_saved(self) -> float:
+        return sum(goal["saved_amount"] for goal in self.goals)
+
+def _scalar_total(column, account_column, account_id):
+    """correlated SELECT COALESCE(SUM(column), 0) ... WHERE account_id = :id, used as a column of the main query"""
+    return (select(func.coalesce(func.sum(column), 0.0))
+            .where(account_column == account_id)
+            .scalar_subquery())
+
+def build_account_snapshot(db_session: Session, account_id: int) -> AccountSnapshot:
+    # weekly cost of recurring expenses, using the same conversions as BudgetManager (monthly / 4, daily * 7)
+    weekly_expense_amount = case(
+        (RecurringExpense.frequency == 'weekly', RecurringExpense.amount),
+        (RecurringExpense.frequency == 'monthly', RecurringExpense.amount / 4),
+        (RecurringExpense.frequency == 'daily', RecurringExpense.amount * 7),
+        else_=0.0,
+    )
+
+    # spending comes from the monthly rollups (one row per month) rather than from every Spending row
+    monthly = (SpendingRollup.account_id == account_id) & (SpendingRollup.period_type == 'month')
+
+    totals = db_session.execute(select(
+        _scalar_total(Asset.value, Asset.account_id, account_id),
+        _scalar_total(Investment.amount, Investment.account_id, account_id),
+        select(func.coalesce(func.sum(SpendingRollup.total), 0.0)).where(monthly).scalar_subquery(),
+        select(func.coalesce(func.sum(SpendingRollup.count), 0)).where(monthly).scalar_subquery(),
+        _scalar_total(weekly_expense_amount, RecurringExpense.account_id, account_id),
+    )).one()
+
+    # saved_total is the running total maintained by the deposit services, so no join on deposits is needed
+    goal_rows = db_session.execute(
+        select(SavingsGoal.id, SavingsGoal.item, SavingsGoal.cost, SavingsGoal.purchased,
+               func.coalesce(SavingsGoal.saved_total, 0.0))
+        .where(SavingsGoal.account_id == account_id)
+        .order_by(SavingsGoal.id)
+    ).all()
+
+    goals = [
+        {"id": goal_id, "item": item, "cost": cost, "purchased": bool(purchased), "saved_amount": float(saved)}
+        for goal_id, item, cost, purchased, saved in goal_rows
+    ]
+
+    return AccountSnapshot(*totals, goals=goals)
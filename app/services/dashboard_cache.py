@@ -0,0 +1,164 @@
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from sqlalchemy import update
+from app import db
+from app.models import Account
+from flask import current_app
+
+__all__ = [
+    "MemoryCacheBackend",
+    "SQLiteCacheBackend",
+    "DashboardCache",
+    "init_cache",
+    "get_cache",
+    "bump_account_versions",
+]
+
+# Bump when the shape of get_dashboard_data's output changes, so entries written by an older deploy
+# (which survive restarts in the SQLite backend) are treated as misses instead of being rendered.
+CACHE_FORMAT = 1
+
+# Each backend keeps at most one entry per account: (stamp, data). The stamp is the account version plus
+# the date the data was computed for, so a write (which bumps the version) or a new day (which moves the
+# weekly summary and goal ETAs) makes the stored entry a miss and the next set() replaces it.
+
+class MemoryCacheBackend:
+    """In-process LRU. Fast, but every gunicorn worker has its own copy."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, account_id: int, stamp: str):
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(account_id)
+            return entry[1]
+
+    def set(self, account_id: int, stamp: str, data):
+        with self._lock:
+            self._entries[account_id] = (stamp, data)
+            self._entries.move_to_end(account_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # least recently used
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCacheBackend:
+    """
+    On-disk store shared by every worker on the host. Entries are pickled, so only point it at
+    a file the app itself owns. The table is pruned to the max_entries most recently written rows.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL") # readers don't block the worker that's writing
+            conn.execute("CREATE TABLE IF NOT EXISTS dashboard_cache ("
+                         "account_id INTEGER PRIMARY KEY, stamp TEXT NOT NULL, data BLOB NOT NULL, "
+                         "written_at REAL NOT NULL DEFAULT (julianday('now')))")
+
+    def _connect(self):
+        # a connection per call keeps this safe across threads; opening a local sqlite file is cheap
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, account_id: int, stamp: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM dashboard_cache WHERE account_id = ? AND stamp = ?",
+                               (account_id, stamp)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, account_id: int, stamp: str, data):
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO dashboard_cache (account_id, stamp, data, written_at) "
+                         "VALUES (?, ?, ?, julianday('now'))", (account_id, stamp, blob))
+            conn.execute("DELETE FROM dashboard_cache WHERE account_id IN ("
+                         "SELECT account_id FROM dashboard_cache ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+                         (self.max_entries,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM dashboard_cache")
+
+class DashboardCache:
+    """get_dashboard_data results keyed by (account id, account version, date), with hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, account_id: int, version: int, today, build):
+        """cached data for this account version and date, or build() it and store the result"""
+        stamp = f"{CACHE_FORMAT}:{version}:{today.isoformat()}"
+        data = self.backend.get(account_id, stamp)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        data = build()
+        self.backend.set(account_id, stamp, data)
+        return data
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """counters for this process only"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def init_cache(app):
+    """
+    Build the backend named by DASHBOARD_CACHE_BACKEND ("memory", "sqlite" or "none")
+    and keep it on the app. Called from create_app.
+    """
+    backend_name = app.config.get("DASHBOARD_CACHE_BACKEND") or "memory"
+    max_entries = int(app.config.get("DASHBOARD_CACHE_SIZE") or 1024)
+
+    if backend_name == "none":
+        cache = None
+    elif backend_name == "memory":
+        cache = DashboardCache(MemoryCacheBackend(max_entries))
+    elif backend_name == "sqlite":
+        path = app.config.get("DASHBOARD_CACHE_PATH") or os.path.join(app.instance_path, "dashboard_cache.sqlite")
+        cache = DashboardCache(SQLiteCacheBackend(path, max_entries))
+    else:
+        raise ValueError(f"Unknown DASHBOARD_CACHE_BACKEND '{backend_name}'. Use memory, sqlite or none.")
+
+    app.extensions["dashboard_cache"] = cache
+
+def get_cache():
+    """the app's DashboardCache, or None when caching is turned off"""
+    return current_app.extensions.get("dashboard_cache")
+
+def bump_account_versions(account_ids=None):
+    """
+    "version = version + 1" for these accounts (every account when None), for bulk writes that go around
+    the ORM. Runs in the caller's transaction and doesn't commit. ORM writers call Account.bump_version().
+    """
+    stmt = update(Account).values(version=Account.version + 1)
+    if account_ids is not None:
+        account_ids = list(account_ids)
+        if not account_ids:
+            return
+        stmt = stmt.where(Account.id.in_(account_ids))
+    db.session.execute(stmt)
@@ -1,10 +1,25 @@
-from app.calculations import BudgetManager
-from app import db
+from datetime import date
+from app.services.dashboard_cache import get_cache
+from app.services.deposits import recent_deposits
+from app.services.registry import get_budget_manager
+from app.services.spending_history import spending_page
 
-def get_dashboard_data(account):
-    """Get all data needed for dashboard display"""
+def get_dashboard_data(account, today=None):
+    """
+    Get all data needed for dashboard display.
+
+    The result only holds plain values (no ORM objects) so it can be cached. It is served from the dashboard
+    cache while the account's version and the date are unchanged, and rebuilt after any write bumps the version.
+    """
+    today = today or date.today()
+    cache = get_cache()
+    if cache is None:
+        return _build_dashboard_data(account, today)
+    return cache.get_or_build(account.id, account.version, today, lambda: _build_dashboard_data(account, today))
+
+def _build_dashboard_data(account, today):
     # Create budget manager for calculations
-    bm = BudgetManager(db.session, account.id)
+    bm = get_budget_manager(account.id)
     
     # assets data
     assets = [{'name': 'Cash Balance', 'value': account.current_balance}]
@@ -31,20 +46,30 @@ def get_dashboard_data(account):
     else:
         bal_status = f"You are ${abs(diff):.2f} below your minimum balance goal."
 
-    # sort spendings by date (newest first)
-    sorted_spendings = sorted(account.spendings, key=lambda s: (s.date, s.id), reverse=True)
+    # most recent spendings (newest first); older pages are loaded on demand from /api/spendings
+    recent_spendings = spending_page(account.id)
 
     # Filter purchased goals out from the dashboard display
-    active_goals = [goal for goal in account.savings_goals if not goal.purchased]
+    active_goals = [
+        {'id': goal.id, 'item': goal.item, 'cost': goal.cost, 'current_amount': goal.current_amount,
+         'progress_percent': goal.progress_percent, 'is_funded': goal.is_funded}
+        for goal in account.savings_goals if not goal.purchased
+    ]
+
+    investments = [{'stock_name': inv.stock_name, 'amount': inv.amount} for inv in account.investments]
     
     return {
         'net_worth': net_worth,
         'balance': balance,
         'balance_status': bal_status,
         'assets': assets,
-        'investments': account.investments,
-        'spendings': sorted_spendings,
+        'investments': investments,
+        'spendings': recent_spendings['spendings'],
+        'spendings_next': recent_spendings['next'], # cursor for the "load older" button, None when there are no more
         'savings_goals': active_goals,
+        'recent_deposits': recent_deposits(account.id), # listed in the deposit tab, each with a remove button
         'health_score': health_score,
-        'weekly_summary': bm.get_weekly_summary(4)
+        'weekly_summary': bm.get_weekly_summary(4, today),
+        # keyed by goal id so the template can look up each goal's projected funding date
+        'savings_timeline': {entry['goal_id']: entry for entry in bm.savings_timeline(today)}
     }
\ No newline at end of file
@@ -1,6 +1,9 @@
-from datetime import date
+from sqlalchemy import func, select, update
 from app import db
 from app.models import SavingsGoal, SavingsDeposit, Spending
+from app.services.dashboard_cache import bump_account_versions
+from app.services.registry import invalidate_account
+from app.services.spending_rollup import record_spending
 from app.utilities.date_utils import get_effective_date
 from flask import flash
 
@@ -32,9 +35,11 @@ def create_deposit(goal_id: int, amount: float):
         goal=goal
     )
     
-    # Reduce account balance
+    # Reduce account balance and keep the goal's running total in step with its deposits
     account.current_balance -= amount
+    goal.add_to_saved_total(amount)
     db.session.add(deposit)
+    db.session.flush() # so is_funded below reads the total as stored, other deposits included
     
     # If goal is now fully funded, create a spending record (without reducing balance again)
     # This avoids double counting the spending since the deposit already reduced the balance
@@ -52,7 +57,70 @@ def create_deposit(goal_id: int, amount: float):
         goal.purchase_date = get_effective_date()
 
         db.session.add(spending)
+        record_spending(account.id, spending.date, spending.amount)
         flash(f"Congratulations! Your goal '{goal.item}' is now fully funded and has been marked as purchased!", "success")
     
+    account.bump_version()
     db.session.commit()
-    return deposit
\ No newline at end of file
+    invalidate_account(account.id)
+    return deposit
+
+def delete_deposit(deposit_id: int, account_id: int):
+    """Remove a deposit, refund it to the account balance and take it off the goal's running total."""
+    deposit = SavingsDeposit.query.get(deposit_id)
+    if not deposit or deposit.goal.account_id != account_id:
+        raise ValueError("Deposit not found")
+
+    goal = deposit.goal
+    if goal.purchased:
+        raise ValueError(f"'{goal.item}' has already been purchased, so its deposits can't be removed.")
+
+    goal.add_to_saved_total(-deposit.amount)
+    goal.account.current_balance += deposit.amount
+    goal.account.bump_version()
+    db.session.delete(deposit)
+    db.session.commit()
+    invalidate_account(account_id)
+
+def recent_deposits(account_id: int, limit: int = 10) -> list:
+    """the account's latest deposits into goals not yet purchased (newest first), as plain dicts for the deposit tab"""
+    rows = db.session.execute(
+        select(SavingsDeposit.id, SavingsGoal.item, SavingsDeposit.amount, SavingsDeposit.date)
+        .join(SavingsGoal, SavingsDeposit.savings_goal_id == SavingsGoal.id)
+        .where(SavingsGoal.account_id == account_id, SavingsGoal.purchased.isnot(True))
+        .order_by(SavingsDeposit.date.desc(), SavingsDeposit.id.desc())
+        .limit(limit)
+    )
+    return [{'id': row.id, 'item': row.item, 'amount': row.amount, 'date': row.date} for row in rows]
+
+def reconcile_goal_totals(fix: bool = False) -> list:
+    """
+    Compare every goal's saved_total with the sum of its deposits in one GROUP BY query.
+
+    Args:
+        fix - when True, overwrite the mismatched totals with the real sums and commit
+
+    Returns a list of (goal_id, stored_total, actual_total) for each goal that was out of sync.
+    """
+    deposit_sums = (select(SavingsDeposit.savings_goal_id.label("goal_id"),
+                           func.sum(SavingsDeposit.amount).label("total"))
+                    .group_by(SavingsDeposit.savings_goal_id)
+                    .subquery())
+    rows = db.session.execute(
+        select(SavingsGoal.id, SavingsGoal.account_id, SavingsGoal.saved_total, func.coalesce(deposit_sums.c.total, 0.0))
+        .outerjoin(deposit_sums, deposit_sums.c.goal_id == SavingsGoal.id)
+    ).all()
+
+    # ignore float rounding below half a cent
+    out_of_sync = [row for row in rows if abs((row[2] or 0.0) - row[3]) > 0.005]
+    mismatches = [(goal_id, stored or 0.0, actual) for goal_id, _, stored, actual in out_of_sync]
+
+    if fix and mismatches:
+        # executemany UPDATE keyed by primary key, so the whole rebuild is one statement
+        db.session.execute(update(SavingsGoal), [
+            {"id": goal_id, "saved_total": actual} for goal_id, _, actual in mismatches
+        ])
+        bump_account_versions({account_id for _, account_id, _, _ in out_of_sync})
+        db.session.commit()
+
+    return mismatches
@@ -1,108 +1,209 @@
+import time
+from collections import defaultdict
 from datetime import date, timedelta
+from sqlalchemy import bindparam, or_, select, update
 from app import db
-from app.models import Spending
-from app.calculations import BudgetManager
+from app.models import Account, RecurringExpense, Spending
+from app.services.registry import invalidate_account
+from app.services.spending_rollup import apply_spending_deltas
+from app.utilities.db_utils import dialect_insert
 from flask import flash
 
+__all__ = [
+    "process_recurring_expenses",
+    "process_all_recurring_expenses",
+    "due_occurrences",
+]
+
+def _month_end(d):
+    # start from the 28th, add 4 days to land in next month, then step back by that day number to get this month's last day.
+    # this works for all months, including february.
+    next_month = d.replace(day=28) + timedelta(days=4)
+    return next_month - timedelta(days=next_month.day)
+
+def due_occurrences(frequency, start, end):
+    """
+    Dates in [start, end] on which an expense with this frequency is charged:
+        daily   - every day
+        weekly  - every Monday
+        monthly - the last day of every month
+    """
+    if start > end:
+        return []
+    if frequency == 'daily':
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if frequency == 'weekly':
+        first = start + timedelta(days=(0 - start.weekday()) % 7) # first Monday on or after start
+        return [first + timedelta(days=i) for i in range(0, (end - first).days + 1, 7)]
+    if frequency == 'monthly':
+        dates = []
+        day = _month_end(start)
+        while day <= end:
+            dates.append(day)
+            day = _month_end(day + timedelta(days=1))
+        return dates
+    return []
+
+def _period_start(frequency, d):
+    """start of the day/week/month a charge covers, stored on the Spending as recurring_period_start"""
+    if frequency == 'weekly':
+        return d - timedelta(days=d.weekday())
+    if frequency == 'monthly':
+        return d.replace(day=1)
+    return d
+
+def _process_accounts(account_ids, today):
+    """
+    Charge every due occurrence for the given accounts, from each expense's watermark up to today.
+
+    All the reads for the chunk are a fixed number of queries (expenses, balances, periods already charged),
+    occurrences are generated in memory in date order per account against a running balance, and the
+    writes are one bulk INSERT, two executemany UPDATEs and the rollup update. Nothing is committed here.
+    A charge skipped for insufficient funds holds its expense's watermark back, so it is retried next run.
+
+    A run going on at the same time (the CLI job and a dashboard visit) may charge a period after it was
+    read here. The INSERT skips periods already on the (expense, period) unique index and returns the rows
+    it did insert, and only those are debited and added to the rollups.
+
+    Returns (charges, amount, failures) where failures is a list of (account_id, message).
+    """
+    expenses = RecurringExpense.query.filter(
+        RecurringExpense.account_id.in_(account_ids),
+        or_(RecurringExpense.processed_through.is_(None), RecurringExpense.processed_through < today),
+    ).all()
+    if not expenses:
+        return 0, 0.0, []
+
+    # an expense that has never been processed starts today, so adding one doesn't back-charge the past
+    windows = {exp.id: (exp.processed_through + timedelta(days=1) if exp.processed_through else today) for exp in expenses}
+    earliest = min(_period_start(exp.frequency, windows[exp.id]) for exp in expenses)
+
+    balances = dict(db.session.execute(
+        select(Account.id, Account.current_balance).where(Account.id.in_(account_ids))
+    ).all())
+
+    # periods already charged in the window, fetched in one query on the (expense, period) unique index
+    charged_periods = set(db.session.execute(
+        select(Spending.recurring_expense_id, Spending.recurring_period_start).where(
+            Spending.recurring_expense_id.in_([exp.id for exp in expenses]),
+            Spending.recurring_period_start >= earliest,
+        )).all())
+
+    # every due occurrence, ordered by date within each account so the running balance is applied in order
+    occurrences = defaultdict(list)
+    for exp in expenses:
+        item = f"Recurring: {exp.name}"
+        for day in due_occurrences(exp.frequency, windows[exp.id], today):
+            period = _period_start(exp.frequency, day)
+            if (exp.id, period) not in charged_periods:
+                occurrences[exp.account_id].append((day, exp.id, period, item, exp.amount))
+
+    new_spendings = []
+    failures = []
+    through = {exp.id: today for exp in expenses} # how far each expense's watermark moves
+    for account_id, due in occurrences.items():
+        balance = balances[account_id]
+        for day, expense_id, period, item, amount in sorted(due):
+            if amount > balance:
+                # same rule and message as make_personal_spend. The watermark stops the day before, so the next
+                # run retries the charge; the balance only goes down here, so no later occurrence of it was charged
+                failures.append((account_id, f"Insufficient funds for '{item}'. You need ${amount:.2f} but have only ${balance:.2f}."))
+                through[expense_id] = min(through[expense_id], day - timedelta(days=1))
+                continue
+            balance -= amount
+            new_spendings.append({"item": item, "amount": amount, "date": day, "account_id": account_id,
+                                  "recurring_expense_id": expense_id, "recurring_period_start": period})
+
+    if not new_spendings:
+        inserted = []
+    else:
+        spendings = Spending.__table__
+        inserted = db.session.execute(
+            dialect_insert(spendings)
+            .on_conflict_do_nothing(index_elements=[spendings.c.recurring_expense_id, spendings.c.recurring_period_start])
+            .returning(spendings.c.account_id, spendings.c.date, spendings.c.amount),
+            new_spendings).all()
+
+    rollup_deltas = defaultdict(lambda: [0.0, 0])
+    spent = defaultdict(float)
+    for account_id, day, amount in inserted:
+        rollup_deltas[(account_id, day)][0] += amount
+        rollup_deltas[(account_id, day)][1] += 1
+        spent[account_id] += amount
+
+    if inserted:
+        apply_spending_deltas({key: tuple(delta) for key, delta in rollup_deltas.items()})
+        accounts = Account.__table__
+        db.session.execute(
+            update(accounts).where(accounts.c.id == bindparam("account_id"))
+            .values(current_balance=accounts.c.current_balance - bindparam("spent"),
+                    version=accounts.c.version + 1),
+            [{"account_id": account_id, "spent": amount} for account_id, amount in spent.items()])
+
+    expense_table = RecurringExpense.__table__
+    db.session.execute(
+        update(expense_table).where(expense_table.c.id == bindparam("expense_id"))
+        .values(processed_through=bindparam("through")),
+        [{"expense_id": exp.id, "through": through[exp.id]} for exp in expenses])
+
+    return len(inserted), sum(spent.values()), failures
+
 def process_recurring_expenses(account, custom_date=None):
     """
-    Processes recurring expenses by creating Spending records based on frequency.
+    Processes recurring expenses for one account by creating Spending records for every
+    occurrence due since the last run (missed days, Mondays and month-ends included).
 
     Args:
         account: Account object to process expenses for
         custom_date: Optional date override for simulation purposes
     """
     today = custom_date or date.today()
-    
-    for expense in account.expenses:
-        # For each expense, determine if we need to create a spending record
-        if expense.frequency == 'daily':
-            _process_daily_expense(expense, account, today)
-        elif expense.frequency == 'weekly':
-            _process_weekly_expense(expense, account, today)
-        elif expense.frequency == 'monthly':
-            _process_monthly_expense(expense, account, today)
-    
-    # Commit all new spending records at once
+
+    # nothing to do when every expense has already been processed through today (the usual page view)
+    if all(exp.processed_through and exp.processed_through >= today for exp in account.expenses):
+        return
+
+    _, _, failures = _process_accounts([account.id], today)
     db.session.commit()
+    invalidate_account(account.id)
+
+    # after a long absence one expense can fail many times, so show the first failure and a count
+    if failures:
+        flash(failures[0][1], "danger")
+    if len(failures) > 1:
+        flash(f"{len(failures) - 1} more recurring charge(s) were skipped for insufficient funds.", "danger")
+
+def process_all_recurring_expenses(today=None, chunk_size: int = 500) -> dict:
+    """
+    Catch up recurring expenses for every account, `chunk_size` accounts at a time with one commit per chunk.
+
+    Returns counts and timings for reporting.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+    stats = {"accounts": 0, "charges": 0, "amount": 0.0, "failures": 0}
+
+    last_id = 0
+    while True:
+        account_ids = db.session.execute(
+            select(RecurringExpense.account_id)
+            .where(RecurringExpense.account_id > last_id,
+                   or_(RecurringExpense.processed_through.is_(None), RecurringExpense.processed_through < today))
+            .group_by(RecurringExpense.account_id)
+            .order_by(RecurringExpense.account_id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not account_ids:
+            break
+        last_id = account_ids[-1]
+
+        charges, amount, failures = _process_accounts(account_ids, today)
+        db.session.commit()
+
+        stats["accounts"] += len(account_ids)
+        stats["charges"] += charges
+        stats["amount"] += amount
+        stats["failures"] += len(failures)
 
-def _process_daily_expense(expense, account, today):
-    """Process a daily recurring expense"""
-    # Check if there's already a spending record for this expense today
-    existing = Spending.query.filter_by(
-        item=f"Recurring: {expense.name}",
-        account_id=account.id,
-        date=today
-    ).first()
-    
-    if not existing:
-        bm = BudgetManager(db.session, account.id)
-        try:
-            # Try to make spending, will validate funds automatically
-            bm.make_personal_spend(
-                f"Recurring: {expense.name}", 
-                expense.amount,
-                today
-            )
-        except ValueError as e:
-            flash(str(e), "danger")
-
-def _process_weekly_expense(expense, account, today):
-    """Process a weekly recurring expense (on Mondays)"""
-    if today.weekday() == 0:  # Monday
-        # Check if there's already a spending record for this expense this week
-        start_of_week = today
-        end_of_week = today + timedelta(days=6)
-        
-        # Ensure we only create one spending record for the week
-        # Check if there's already a spending record for this expense this week
-        existing = Spending.query.filter(
-            Spending.item == f"Recurring: {expense.name}",
-            Spending.account_id == account.id,
-            Spending.date >= start_of_week,
-            Spending.date <= end_of_week
-        ).first()
-        
-        if not existing:
-            bm = BudgetManager(db.session, account.id)
-            try:
-                # Try to make spending, will validate funds automatically
-                bm.make_personal_spend(
-                    f"Recurring: {expense.name}", 
-                    expense.amount,
-                    today
-                )
-            except ValueError as e:
-                flash(str(e), "danger")
-
-def _process_monthly_expense(expense, account, today):
-    """Process a monthly recurring expense (on last day of month)"""
-    # Check if today is the last day of the month by starting from the 28th, adding 4 days, and then subtracting the number of days in that month
-    # this will work for all months, including february and will give us the last day of the month.
-    next_month = today.replace(day=28) + timedelta(days=4)
-    last_day = (next_month - timedelta(days=next_month.day)).day
-    
-    if today.day == last_day:
-        # Check if there's already a spending record for this expense this month
-        month_start = today.replace(day=1)
-        
-        # Ensure we only create one spending record for the month
-        # Check if there's already a spending record for this expense this month
-        existing = Spending.query.filter(
-            Spending.item == f"Recurring: {expense.name}",
-            Spending.account_id == account.id,
-            Spending.date >= month_start,
-            Spending.date <= today
-        ).first()
-        
-        if not existing:
-            bm = BudgetManager(db.session, account.id)
-            try:
-                # Try to make spending, will validate funds automatically
-                bm.make_personal_spend(
-                    f"Recurring: {expense.name}", 
-                    expense.amount,
-                    today
-                )
-            except ValueError as e:
-                flash(str(e), "danger")
\ No newline at end of file
+    stats["seconds"] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import date
+from sqlalchemy import select
+from app import db
+from app.models import Asset, Investment, RecurringExpense, SavingsDeposit, SavingsGoal, Spending
+
+__all__ = [
+    "EXPORT_KINDS",
+    "EXPORT_FORMATS",
+    "export_query",
+    "iter_export",
+]
+
+EXPORT_KINDS = ("spendings", "deposits", "expenses", "assets", "investments")
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"} # format -> mimetype
+EXPORT_YIELD_PER = 1000 # rows fetched from the cursor, and written out, at a time
+
+def export_query(kind: str, account_id: int):
+    """column-only SELECT for one kind of the account's rows, in a stable order (no ORM objects, no identity map)"""
+    if kind == "spendings":
+        # same columns the statement import reads, so a CSV export can be imported into another account
+        return (select(Spending.id, Spending.date, Spending.item, Spending.amount,
+                       Spending.recurring_expense_id.is_not(None).label("recurring"))
+                .where(Spending.account_id == account_id)
+                .order_by(Spending.date, Spending.id)) # (account_id, date, id) index
+    if kind == "deposits":
+        return (select(SavingsDeposit.id, SavingsDeposit.date, SavingsDeposit.amount,
+                       SavingsGoal.id.label("goal_id"), SavingsGoal.item.label("goal"))
+                .join(SavingsGoal, SavingsDeposit.savings_goal_id == SavingsGoal.id)
+                .where(SavingsGoal.account_id == account_id)
+                .order_by(SavingsDeposit.date, SavingsDeposit.id))
+    if kind == "expenses":
+        return (select(RecurringExpense.id, RecurringExpense.name, RecurringExpense.amount,
+                       RecurringExpense.frequency, RecurringExpense.processed_through)
+                .where(RecurringExpense.account_id == account_id)
+                .order_by(RecurringExpense.id))
+    if kind == "assets":
+        return select(Asset.id, Asset.name, Asset.value).where(Asset.account_id == account_id).order_by(Asset.id)
+    if kind == "investments":
+        return (select(Investment.id, Investment.stock_name, Investment.amount)
+                .where(Investment.account_id == account_id).order_by(Investment.id))
+    raise ValueError(f"Unknown export '{kind}'. Use one of: {', '.join(EXPORT_KINDS)}.")
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def iter_export(account_id: int, kind: str, fmt: str = "csv"):
+    """
+    Generator of text chunks for one kind of the account's rows as CSV (with a header row) or NDJSON
+    (one JSON object per line). Raises ValueError straight away for an unknown kind or format.
+
+    Rows are read with yield_per, which streams them from a server-side cursor on Postgres, and written
+    out EXPORT_YIELD_PER at a time, so memory stays constant however many rows there are. Nothing runs
+    until the first chunk is asked for; with CSV the header is sent before the query does any work.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    query = export_query(kind, account_id).execution_options(yield_per=EXPORT_YIELD_PER)
+
+    def generate():
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(column.name for column in query.selected_columns)
+            yield buffer.getvalue()
+            for rows in db.session.execute(query).partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+        else:
+            columns = [column.name for column in query.selected_columns]
+            for rows in db.session.execute(query).partitions():
+                yield "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
+
+    return generate()
@@ -0,0 +1,97 @@
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import func, select, update
+from app import db
+from app.models import Account
+
+__all__ = [
+    "due_pay_cycles",
+    "credit_all_due_paydays",
+]
+
+def due_pay_cycles(last_pay_credit, pay_day_of_week, pay_frequency, today):
+    """
+    How many pay cycles are owed on `today`, and the date of the latest one.
+
+    Uses the same rule as BudgetManager.credit_payday_if_due (credit on the payday weekday once a
+    full cycle has passed since the last credit), but counts every payday that was missed since then.
+    An account that has never been credited is only paid on the payday itself, like the dashboard does.
+
+    Returns (cycles, last_payday); cycles is 0 and last_payday None when nothing is due.
+    """
+    pay_day_of_week = 4 if pay_day_of_week is None else pay_day_of_week
+    cycle_days = 14 if pay_frequency == "biweekly" else 7
+
+    if last_pay_credit is None:
+        return (1, today) if today.weekday() == pay_day_of_week else (0, None)
+
+    # first payday weekday at least one full cycle after the last credit
+    earliest = last_pay_credit + timedelta(days=cycle_days)
+    first = earliest + timedelta(days=(pay_day_of_week - earliest.weekday()) % 7)
+    if first > today:
+        return 0, None
+
+    # cycles are a whole number of weeks, so every later payday is first + n * cycle_days
+    cycles = (today - first).days // cycle_days + 1
+    return cycles, first + timedelta(days=(cycles - 1) * cycle_days)
+
+def credit_all_due_paydays(today=None, chunk_size: int = 5000) -> dict:
+    """
+    Credit wages to every account whose payday is due, including any missed cycles.
+
+    Accounts are read in id order in chunks of `chunk_size` (only the columns needed) and the owed cycles
+    are worked out in memory. Accounts owed the same cycles (same last credit, payday and frequency, which
+    is usually most of them) are credited with one "UPDATE ... WHERE id IN (...) RETURNING", and each chunk
+    is committed once. The UPDATE only applies where last_pay_credit is still what was read, so running this
+    twice (or alongside a dashboard visit that credits the same account) never pays a cycle twice, and the
+    stats only count the rows it returned.
+
+    Returns counts and timings for reporting.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+    stats = {"accounts_scanned": 0, "accounts_credited": 0, "cycles_credited": 0, "amount_credited": 0.0}
+
+    accounts = Account.__table__
+    # same amount as credit_payday_if_due: weekly income, doubled for a biweekly cycle, times the cycles owed
+    weekly_income = func.coalesce(accounts.c.hourly_wage, 0) * func.coalesce(accounts.c.hours_per_week, 0)
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(accounts.c.id, accounts.c.pay_frequency, accounts.c.pay_day_of_week, accounts.c.last_pay_credit)
+            .where(accounts.c.id > last_id)
+            .order_by(accounts.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stats["accounts_scanned"] += len(rows)
+
+        groups = defaultdict(list) # (previous credit, paid on, cycles, cycle multiplier) -> account ids
+        for row in rows:
+            cycles, paid_on = due_pay_cycles(row.last_pay_credit, row.pay_day_of_week, row.pay_frequency, today)
+            if cycles:
+                multiplier = 2 if row.pay_frequency == "biweekly" else 1
+                groups[(row.last_pay_credit, paid_on, cycles, multiplier)].append(row.id)
+
+        for (previous_credit, paid_on, cycles, multiplier), ids in groups.items():
+            payment = weekly_income * (multiplier * cycles)
+            credited = db.session.execute(
+                update(accounts)
+                .where(accounts.c.id.in_(ids), accounts.c.last_pay_credit.is_not_distinct_from(previous_credit))
+                .values(current_balance=accounts.c.current_balance + payment,
+                        last_pay_credit=paid_on,
+                        version=accounts.c.version + 1)
+                .returning(payment) # SET doesn't change the wage columns, so this is the amount just added
+            ).scalars().all()
+            stats["accounts_credited"] += len(credited)
+            stats["cycles_credited"] += cycles * len(credited)
+            stats["amount_credited"] += sum(credited)
+        db.session.commit()
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["accounts_per_second"] = stats["accounts_scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
@@ -0,0 +1,40 @@
+from flask import g, has_app_context
+from app import db
+from app.calculations import BudgetManager
+
+__all__ = [
+    "get_account",
+    "get_budget_manager",
+    "invalidate_account",
+]
+
+# Request-scoped identity cache: one Account per user and one BudgetManager per account for the life of
+# the current request (flask.g is reset for every request and app context). Without it, the dashboard view,
+# get_dashboard_data and the form sync each built their own BudgetManager and re-queried the Account.
+
+def get_account(user_id: int):
+    """the user's Account (created if needed), looked up at most once per request"""
+    from app.services.account import get_or_create_account # Has to be here to avoid circular import.
+
+    accounts = g.setdefault("_accounts_by_user", {})
+    if user_id not in accounts:
+        accounts[user_id] = get_or_create_account(user_id)
+    return accounts[user_id]
+
+def get_budget_manager(account_id: int) -> BudgetManager:
+    """the request's BudgetManager for this account, so its cached snapshot is shared by every caller"""
+    managers = g.setdefault("_budget_managers", {})
+    if account_id not in managers:
+        managers[account_id] = BudgetManager(db.session, account_id)
+    return managers[account_id]
+
+def invalidate_account(account_id: int):
+    """
+    Drop the cached snapshot for an account after writing to it outside its BudgetManager
+    (bulk processors, deposits, form sync), so later reads in the same request see the change.
+    """
+    if not has_app_context():
+        return
+    manager = g.get("_budget_managers", {}).get(account_id)
+    if manager is not None:
+        manager.invalidate_snapshot()
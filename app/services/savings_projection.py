@@ -0,0 +1,57 @@
+import math
+from datetime import date, timedelta
+
+def project_savings_timeline(goals, weekly_spendable: float, start=None) -> list:
+    """
+    Work out the week each savings goal gets funded, without simulating week by week.
+
+    Goals are funded one after the other in the order given (the same order the old
+    week-by-week loop used), with all of each week's spendable money going to the first
+    unfunded goal. That means goal k is funded once the total remaining cost of goals
+    0..k has been saved, so its week is simply ceil(cumulative_remaining / weekly_spendable).
+
+    Nothing is written to the DB, so this is safe to call from any request.
+
+    Args:
+        goals - iterable of goal dicts (id, item, cost, saved_amount), e.g. AccountSnapshot.goals
+        weekly_spendable - money left each week after recurring expenses
+        start - date the projection starts from (defaults to today)
+
+    Returns a list of dicts, one per goal, with status "funded", "scheduled" or "unreachable".
+    """
+    start = start or date.today()
+    timeline = []
+    cumulative = 0.0
+
+    for goal in goals:
+        saved = goal["saved_amount"]
+        remaining = max(0.0, goal["cost"] - saved)
+        cumulative += remaining
+
+        if remaining <= 0:
+            status, weeks = "funded", 0
+        elif weekly_spendable <= 0:
+            status, weeks = "unreachable", None # no money left over each week, so this goal never gets funded
+        else:
+            status = "scheduled"
+            # round before ceil so float noise (e.g. 3.0000000001) doesn't push a goal a week later
+            weeks = math.ceil(round(cumulative / weekly_spendable, 9))
+
+        timeline.append({
+            "goal_id": goal["id"],
+            "item": goal["item"],
+            "cost": round(goal["cost"], 2),
+            "saved_amount": round(saved, 2),
+            "remaining": round(remaining, 2),
+            "status": status,
+            "weeks": weeks,
+            "funded_on": (start + timedelta(weeks=weeks)).isoformat() if weeks is not None else None,
+        })
+
+    return timeline
+
+def weeks_until_all_funded(timeline: list):
+    """Weeks until every goal in a timeline is funded, or None if any goal is unreachable."""
+    if any(entry["status"] == "unreachable" for entry in timeline):
+        return None
+    return max((entry["weeks"] for entry in timeline), default=0)
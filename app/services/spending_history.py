@@ -0,0 +1,87 @@
+from datetime import date
+from sqlalchemy import select, tuple_
+from app import db
+from app.models import Spending
+
+__all__ = [
+    "SPENDINGS_PAGE_SIZE",
+    "MAX_SPENDINGS_PAGE_SIZE",
+    "encode_cursor",
+    "decode_cursor",
+    "spending_page",
+]
+
+SPENDINGS_PAGE_SIZE = 50 # the recent window shown on the dashboard and editable in the form
+MAX_SPENDINGS_PAGE_SIZE = 500
+NO_DATE = "null" # cursor date for spendings without one
+
+def encode_cursor(spend_date, spend_id: int) -> str:
+    """opaque-enough page cursor for the last row of a page, e.g. '2025-04-30:1234', or 'null:1234' for an undated row"""
+    return f"{spend_date.isoformat() if spend_date else NO_DATE}:{spend_id}"
+
+def decode_cursor(cursor: str):
+    """(date or None, id) from encode_cursor's format. Raises ValueError for anything else."""
+    try:
+        day, spend_id = cursor.split(":")
+        return None if day == NO_DATE else date.fromisoformat(day), int(spend_id)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+
+def spending_page(account_id: int, before=None, limit: int = SPENDINGS_PAGE_SIZE, start=None, end=None,
+                  min_amount=None, max_amount=None, text=None, recurring=None) -> dict:
+    """
+    One page of the account's spendings, newest first, ordered by (date, id), optionally filtered.
+
+    Keyset pagination: `before` is the cursor of the last row of the previous page and the next page
+    starts strictly after it, so each page is one range scan of the (account_id, date, id) index however
+    deep the history goes (no OFFSET), and rows added meanwhile don't shift the pages.
+
+    Spendings without a date come after all the dated ones, newest id first. They're read with a second
+    query once the dated rows run out, rather than with NULLS LAST, which databases order differently and
+    Postgres can't read straight from the index.
+
+    Filters (all optional, combined with AND):
+        start, end - date range, inclusive
+        min_amount, max_amount - amount range, inclusive
+        text - case-insensitive prefix of the item name
+        recurring - True for charges made by the recurring expense processor, False for everything else
+
+    Returns {'spendings': [{'id', 'item', 'amount', 'date', 'recurring'}, ...], 'next': cursor or None when there are no more}.
+    """
+    cursor = decode_cursor(before) if before is not None else None
+    query = (select(Spending.id, Spending.item, Spending.amount, Spending.date, Spending.recurring_expense_id)
+             .where(Spending.account_id == account_id))
+    if start is not None:
+        query = query.where(Spending.date >= start)
+    if end is not None:
+        query = query.where(Spending.date <= end)
+    if min_amount is not None:
+        query = query.where(Spending.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Spending.amount <= max_amount)
+    if text:
+        query = query.where(Spending.item.istartswith(text, autoescape=True)) # autoescape: % and _ are literal
+    if recurring is not None:
+        query = query.where(Spending.recurring_expense_id.is_not(None) if recurring
+                            else Spending.recurring_expense_id.is_(None))
+
+    rows = [] # limit + 1 rows: the extra one tells us whether there's another page
+    if cursor is None or cursor[0] is not None:
+        dated = query.where(Spending.date.is_not(None)).order_by(Spending.date.desc(), Spending.id.desc())
+        if cursor is not None:
+            # row-value comparison, so the database can seek straight to the cursor in the index
+            dated = dated.where(tuple_(Spending.date, Spending.id) < tuple_(*cursor))
+        rows = db.session.execute(dated.limit(limit + 1)).all()
+    if len(rows) <= limit and start is None and end is None: # a date range leaves out the undated rows
+        undated = query.where(Spending.date.is_(None)).order_by(Spending.id.desc())
+        if cursor is not None and cursor[0] is None:
+            undated = undated.where(Spending.id < cursor[1])
+        rows += db.session.execute(undated.limit(limit + 1 - len(rows))).all()
+
+    page = [{'id': row.id, 'item': row.item, 'amount': row.amount, 'date': row.date,
+             'recurring': row.recurring_expense_id is not None} for row in rows[:limit]]
+    has_more = len(rows) > limit
+    return {
+        'spendings': page,
+        'next': encode_cursor(page[-1]['date'], page[-1]['id']) if has_more else None,
+    }
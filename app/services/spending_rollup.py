@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import delete, func, insert, select
+from app import db
+from app.models import Spending, SpendingRollup
+from app.services.dashboard_cache import bump_account_versions
+from app.utilities.db_utils import dialect_insert
+
+__all__ = [
+    "ROLLUP_PERIODS",
+    "period_start",
+    "record_spending",
+    "unrecord_spending",
+    "apply_spending_deltas",
+    "rebuild_rollups",
+]
+
+ROLLUP_PERIODS = ("day", "week", "month")
+
+def period_start(period_type: str, d: date) -> date:
+    """first day of the day/week/month containing d. Weeks start on Monday."""
+    if period_type == "day":
+        return d
+    if period_type == "week":
+        return d - timedelta(days=d.weekday())
+    return d.replace(day=1)
+
+def record_spending(account_id: int, spend_date, amount: float):
+    """Add one spending to the account's rollups. Call this wherever a Spending row is inserted."""
+    apply_spending_deltas({(account_id, spend_date): (amount, 1)})
+
+def unrecord_spending(account_id: int, spend_date, amount: float):
+    """Take one spending back out of the rollups. Call this before a Spending row is deleted or edited."""
+    apply_spending_deltas({(account_id, spend_date): (-amount, -1)})
+
+def apply_spending_deltas(deltas: dict):
+    """
+    Apply {(account_id, date): (amount_delta, count_delta)} to the day, week and month rollups.
+    Deltas without a date are ignored: a spending with no date isn't in any period, here or in rebuild_rollups.
+
+    Deltas are first merged per rollup key, then written with one executemany INSERT ... ON CONFLICT DO UPDATE
+    (total = total + delta), however many accounts the deltas cover. The upsert keeps two writers adding the
+    first spending of the same period (the recurring job and a dashboard save) from both inserting the row.
+    Nothing is committed here, so the rollup change lands in the same transaction as the spending change that caused it.
+    """
+    merged = defaultdict(lambda: [0.0, 0])
+    for (account_id, spend_date), (amount, count) in deltas.items():
+        if spend_date is None:
+            continue
+        for period_type in ROLLUP_PERIODS:
+            key = (account_id, period_type, period_start(period_type, spend_date))
+            merged[key][0] += amount
+            merged[key][1] += count
+    if not merged:
+        return
+
+    rollups = SpendingRollup.__table__
+    upsert = dialect_insert(rollups)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[rollups.c.account_id, rollups.c.period_type, rollups.c.period_start],
+        set_={"total": rollups.c.total + upsert.excluded.total, "count": rollups.c.count + upsert.excluded.count})
+    db.session.execute(upsert, [
+        {"account_id": account_id, "period_type": period_type, "period_start": start, "total": amount, "count": count}
+        for (account_id, period_type, start), (amount, count) in merged.items()
+    ])
+
+def rebuild_rollups(account_id=None) -> int:
+    """
+    Recompute rollups from the Spending table (all accounts, or just one) and commit.
+
+    Spending is grouped per (account, day) in SQL; weeks and months are then built from those
+    day totals in Python so the query stays portable between Postgres and SQLite.
+
+    Returns the number of rollup rows written.
+    """
+    clear = delete(SpendingRollup)
+    day_totals = (select(Spending.account_id, Spending.date, func.sum(Spending.amount), func.count(Spending.id))
+                  .where(Spending.date.is_not(None))
+                  .group_by(Spending.account_id, Spending.date))
+    if account_id is not None:
+        clear = clear.where(SpendingRollup.account_id == account_id)
+        day_totals = day_totals.where(Spending.account_id == account_id)
+
+    db.session.execute(clear)
+
+    merged = defaultdict(lambda: [0.0, 0])
+    for acc_id, spend_date, total, count in db.session.execute(day_totals):
+        for period_type in ROLLUP_PERIODS:
+            key = (acc_id, period_type, period_start(period_type, spend_date))
+            merged[key][0] += total
+            merged[key][1] += count
+
+    if merged:
+        db.session.execute(insert(SpendingRollup), [
+            {"account_id": acc_id, "period_type": period_type, "period_start": start, "total": total, "count": count}
+            for (acc_id, period_type, start), (total, count) in merged.items()
+        ])
+    bump_account_versions(None if account_id is None else [account_id]) # the dashboard's weekly summary reads these rows
+    db.session.commit()
+    return len(merged)
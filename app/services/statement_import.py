@@ -0,0 +1,249 @@
+import csv
+import hashlib
+import html
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from sqlalchemy import func, insert, select, update
+from app import db
+from app.models import Account, Spending
+from app.services.spending_rollup import apply_spending_deltas
+
+__all__ = [
+    "IMPORT_CHUNK_SIZE",
+    "IMPORT_FORMATS",
+    "iter_csv_rows",
+    "iter_ofx_rows",
+    "import_statement",
+]
+
+IMPORT_CHUNK_SIZE = 5000 # rows per INSERT/commit
+IMPORT_FORMATS = ("csv", "ofx")
+MAX_REPORTED_ERRORS = 20 # per import; the rest are only counted
+CSV_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d.%m.%Y")
+CSV_ITEM_COLUMNS = ("item", "description", "payee", "name", "memo") # first one present is the item name
+ITEM_MAX_LENGTH = Spending.__table__.c.item.type.length
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+# Both parsers are generators over a text stream and yield (line, date, amount, item) as raw strings, one
+# row at a time, so a statement of any length is read in constant memory. Amounts come out in the app's
+# convention: positive is money spent, negative is money received (refunds, wages), which isn't imported.
+
+def _negate(text: str) -> str:
+    text = (text or "").strip()
+    return text[1:] if text.startswith("-") else f"-{text}"
+
+def iter_csv_rows(stream, debits_negative: bool = False):
+    """
+    Rows of a CSV with a header row naming a date column, an item column (item, description, payee,
+    name or memo) and either an amount column or separate debit/credit columns. Header names are
+    case-insensitive. Pass debits_negative for bank exports where money spent is shown as negative.
+    Raises ValueError if the header doesn't have the columns needed.
+    """
+    reader = csv.reader(stream)
+    header = [name.strip().lower() for name in next(reader, [])]
+    columns = {name: i for i, name in reversed(list(enumerate(header)))} # first column wins on repeated names
+    item_col = next((columns[name] for name in CSV_ITEM_COLUMNS if name in columns), None)
+    if "date" not in columns or item_col is None or not ("amount" in columns or "debit" in columns):
+        raise ValueError("The CSV needs a header row with date, item (or description) and amount (or debit/credit) columns.")
+    date_col = columns["date"]
+
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue # blank line
+        values += [""] * (len(header) - len(values))
+        if "amount" in columns:
+            amount = values[columns["amount"]]
+            if debits_negative:
+                amount = _negate(amount)
+        elif values[columns["debit"]].strip():
+            amount = values[columns["debit"]].strip().lstrip("-") # some banks sign the debit column, some don't
+        else:
+            amount = _negate(values[columns["credit"]] if "credit" in columns else "")
+        yield reader.line_num, values[date_col], amount, values[item_col]
+
+def iter_ofx_rows(stream, block_size: int = 65536):
+    """
+    <STMTTRN> transactions of an OFX/QFX file, SGML (1.x, unclosed leaf tags) or XML (2.x). Only the
+    posted date, amount, name and memo are read. The "line" is the transaction's position in the file.
+    """
+    transaction = None
+    number = 0
+    pending = ""
+    for block in iter(lambda: stream.read(block_size), ""):
+        pending += block
+        cut = pending.rfind("<") # the last tag's value may carry on in the next block
+        if cut <= 0:
+            continue
+        text, pending = pending[:cut], pending[cut:]
+        for closing, tag, value in _OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    transaction = {}
+                elif transaction is not None:
+                    number += 1
+                    yield (number, transaction.get("DTPOSTED", "")[:8], _negate(transaction.get("TRNAMT", "")),
+                           transaction.get("NAME") or transaction.get("MEMO") or "")
+                    transaction = None
+            elif transaction is not None and not closing:
+                transaction[tag] = html.unescape(value.strip())
+
+def _parse_date(text: str) -> date:
+    text = text.strip()
+    if len(text) == 10 and text[4] == "-":
+        try:
+            return date.fromisoformat(text) # the usual case, and much cheaper than strptime
+        except ValueError:
+            pass
+    for fmt in CSV_DATE_FORMATS + ("%Y%m%d",):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date '{text}'")
+
+def _parse_amount(text: str) -> float:
+    cleaned = text.strip().replace("$", "").replace(",", "").replace(" ", "")
+    sign = 1
+    while cleaned.startswith("-"): # _negate can put a minus in front of one that's already there
+        sign, cleaned = -sign, cleaned[1:]
+    if cleaned.startswith("(") and cleaned.endswith(")"): # accounting style (12.00)
+        sign, cleaned = -sign, cleaned[1:-1]
+    if not cleaned:
+        raise ValueError("missing amount")
+    try:
+        amount = float(cleaned)
+    except ValueError:
+        amount = math.nan
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f"unrecognised amount '{cleaned}'")
+    return round(sign * amount, 2)
+
+def _row_hash(day: date, amount: float, item: str) -> bytes:
+    """dedupe key for a spending: same day, same amount to the cent, same item ignoring case and spacing"""
+    key = f"{day.isoformat()}|{amount:.2f}|{' '.join(item.split()).casefold()}"
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+def _import_chunk(account_id: int, chunk: list, balance: float, stats: dict, start_id: int, skipped: Counter) -> float:
+    """
+    Insert one chunk of parsed rows: skip the ones already stored, then one INSERT, one rollup update and
+    one balance UPDATE, and commit. Returns the balance after the chunk.
+
+    Rows are matched by count, not just presence: if the account already had n spendings with a row's key
+    when the import started (ids up to start_id), the file's first n rows with that key are the stored ones
+    and the rest are imported, so two identical coffees on one day stay two. Rows with a higher id were
+    added by this import, and `skipped` carries the rows skipped in earlier chunks, so the count is right
+    when a key's rows fall in different chunks.
+    """
+    # the account's rows on the chunk's dates, on the (account_id, date, id) index
+    stored = Counter()
+    imported = Counter()
+    for spend_id, day, amount, item in db.session.execute(
+            select(Spending.id, Spending.date, Spending.amount, Spending.item)
+            .where(Spending.account_id == account_id, Spending.date.in_({day for _, day, _, _ in chunk}))):
+        (imported if spend_id > start_id else stored)[_row_hash(day, amount, item)] += 1
+
+    new_spendings = []
+    rollup_deltas = defaultdict(lambda: [0.0, 0])
+    spent = 0.0
+    for line, day, amount, item in chunk:
+        key = _row_hash(day, amount, item)
+        if imported[key] + skipped[key] < stored[key]:
+            skipped[key] += 1
+            stats["duplicates"] += 1
+            continue
+        if amount > balance:
+            # same rule and message as make_personal_spend
+            _reject(stats, "insufficient", line, f"Insufficient funds for '{item}'. You need ${amount:.2f} but have only ${balance:.2f}.")
+            continue
+        imported[key] += 1
+        balance -= amount
+        spent += amount
+        new_spendings.append({"item": item, "amount": amount, "date": day, "account_id": account_id})
+        rollup_deltas[(account_id, day)][0] += amount
+        rollup_deltas[(account_id, day)][1] += 1
+
+    if new_spendings:
+        db.session.execute(insert(Spending.__table__), new_spendings) # Core executemany, no per-row RETURNING
+        apply_spending_deltas({key: tuple(delta) for key, delta in rollup_deltas.items()})
+        accounts = Account.__table__
+        db.session.execute(
+            update(accounts).where(accounts.c.id == account_id)
+            .values(current_balance=accounts.c.current_balance - spent, version=accounts.c.version + 1))
+    db.session.commit()
+
+    stats["imported"] += len(new_spendings)
+    stats["amount"] += spent
+    stats["chunks"] += 1
+    return balance
+
+def _reject(stats: dict, counter: str, line: int, message: str):
+    stats[counter] += 1
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append(f"Line {line}: {message}")
+
+def import_statement(account_id: int, stream, fmt: str = "csv", debits_negative: bool = False,
+                     chunk_size: int = IMPORT_CHUNK_SIZE, progress=None) -> dict:
+    """
+    Stream a CSV or OFX statement (a text stream) into the account's spendings.
+
+    Rows are validated as they're read and collected into chunks of `chunk_size`. Each chunk is checked
+    against the account's stored spendings by (date, amount, item) hash and count, so importing an
+    overlapping statement (or the same one again) only adds what's new, while a purchase that really
+    happened twice on one day is imported twice. Each chunk is then written with one bulk INSERT, one rollup
+    update and one balance adjustment, and committed. Memory use depends on the chunk size and the number
+    of rows skipped as already stored, not the file size, and an import that fails part way can simply be re-run. Money received (negative amounts) is
+    skipped, and spendings are subject to the same insufficient funds rule as entering them by hand.
+
+    progress, if given, is called with the running stats after every chunk.
+
+    Returns counts and timings: rows, imported, amount, duplicates, credits, invalid, insufficient, chunks,
+    seconds and errors (the first MAX_REPORTED_ERRORS messages). Raises ValueError for an unknown account
+    or format, or a CSV without the columns needed.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(IMPORT_FORMATS)}.")
+    rows = iter_ofx_rows(stream) if fmt == "ofx" else iter_csv_rows(stream, debits_negative)
+
+    started = time.perf_counter()
+    stats = {"rows": 0, "imported": 0, "amount": 0.0, "duplicates": 0, "credits": 0, "invalid": 0,
+             "insufficient": 0, "chunks": 0, "errors": []}
+    row = db.session.execute(select(Account.current_balance).where(Account.id == account_id)).one_or_none()
+    if row is None:
+        raise ValueError(f"No account with id {account_id}.")
+    balance = row.current_balance
+    start_id = db.session.execute(select(func.max(Spending.id))).scalar() or 0
+    skipped = Counter() # row key -> rows skipped as already stored, across chunks
+
+    chunk = []
+    for line, day_text, amount_text, item in rows:
+        stats["rows"] += 1
+        item = " ".join(item.split())[:ITEM_MAX_LENGTH]
+        try:
+            if not item:
+                raise ValueError("missing item name")
+            day = _parse_date(day_text)
+            amount = _parse_amount(amount_text)
+        except ValueError as e:
+            _reject(stats, "invalid", line, str(e))
+            continue
+        if amount < 0:
+            stats["credits"] += 1
+            continue
+
+        chunk.append((line, day, amount, item))
+        if len(chunk) >= chunk_size:
+            balance = _import_chunk(account_id, chunk, balance, stats, start_id, skipped)
+            chunk = []
+            if progress:
+                progress(stats)
+    if chunk:
+        _import_chunk(account_id, chunk, balance, stats, start_id, skipped)
+        if progress:
+            progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,289 @@
+import re
+import threading
+import time as clock
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, time, timedelta, timezone
+import requests
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.instrumentation import timed
+from app.models import StockPrice, StockSymbol
+from flask import current_app
+
+__all__ = [
+    "HISTORY_WINDOWS",
+    "normalize_symbol",
+    "fetch_yahoo_history",
+    "get_price_history",
+]
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}" # default for the YAHOO_CHART_URL setting
+YAHOO_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+HISTORY_WINDOWS = {"1m": 31, "6m": 183, "5y": 1827} # windows the endpoint serves, in days. 6m is the dashboard chart
+FULL_HISTORY_RANGE = "5y" # first fetch of a symbol loads the longest window, later fetches only add new bars
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-^=]{1,20}$") # tickers like AAPL, BRK-B, ^GSPC, EURUSD=X
+
+# Upstream calls run on one bounded pool per process, so a request for 10 symbols waits roughly as long as
+# the slowest one instead of the sum of all of them. A symbol already being fetched (by this request or a
+# concurrent one in the same worker) is joined instead of fetched again. Each job stores what it fetched
+# itself, so a fetch that outlives the request that started it (deadline, stale-while-revalidate) isn't lost.
+_executor = None
+_breaker = None
+_in_flight = {} # symbol -> Future of the fetch-and-store job currently running for it
+_lock = threading.RLock() # re-entrant: add_done_callback runs the callback inline when the future is already done
+_thread_local = threading.local() # one requests.Session per pool thread, so connections to Yahoo are reused
+
+def _utcnow():
+    # fetched_at is stored as naive UTC so it compares the same on Postgres and SQLite
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class CircuitBreaker:
+    """
+    Stops calling Yahoo for `cooldown` seconds after `threshold` consecutive failures (open), then lets
+    a single trial call through (half-open): success closes the breaker, failure opens it again.
+    Per process, like the fetch pool.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or clock.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = clock.monotonic()
+            self.trial_running = False
+
+def normalize_symbol(symbol):
+    """upper-cased ticker, or None if it isn't a plausible symbol (keeps junk out of the store and the Yahoo URL)"""
+    symbol = (symbol or "").strip().upper()
+    return symbol if SYMBOL_PATTERN.match(symbol) else None
+
+def _http():
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+        _thread_local.session.headers.update(YAHOO_HEADERS)
+    return _thread_local.session
+
+def fetch_yahoo_history(symbol: str, url: str = YAHOO_CHART_URL, timeout: float = 10, since=None) -> list:
+    """
+    Weekly closes for one symbol from Yahoo Finance, as (date, close) pairs: the full FULL_HISTORY_RANGE,
+    or only the bars from `since` onwards. Raises requests.RequestException on network errors and
+    ValueError when Yahoo has no data.
+
+    Needs no app context, so everything it uses is passed in.
+    """
+    params = {'interval': '1wk'} # weekly data
+    if since is None:
+        params['range'] = FULL_HISTORY_RANGE
+    else:
+        params['period1'] = int(datetime.combine(since, time(), tzinfo=timezone.utc).timestamp())
+        params['period2'] = int(datetime.now(timezone.utc).timestamp())
+    r = _http().get(url.format(symbol=symbol), params=params, timeout=timeout)
+    if r.status_code >= 500:
+        r.raise_for_status() # upstream trouble (counts towards the circuit breaker); a 404 still carries the JSON error below
+    data = r.json()
+
+    # Parse Yahoo Finance data format
+    if not ('chart' in data and 'result' in data['chart'] and data['chart']['result']):
+        raise ValueError("No data available from Yahoo Finance")
+
+    result = data['chart']['result'][0]
+    closes = result['indicators']['quote'][0].get('close') or []
+    return [(date.fromtimestamp(ts), close)
+            for ts, close in zip(result.get('timestamp') or [], closes) if close is not None]
+
+def _forget(symbol, future):
+    with _lock:
+        if _in_flight.get(symbol) is future:
+            del _in_flight[symbol]
+
+def _store_history(symbol: str, bars: list, fetched_at: datetime):
+    """replace the symbol's rows over the fetched range with the new bars, and record the fetch time and newest bar"""
+    stored = db.session.get(StockSymbol, symbol)
+    if stored is None:
+        stored = StockSymbol(symbol=symbol)
+        db.session.add(stored)
+    stored.fetched_at = fetched_at
+    db.session.flush()
+
+    if bars:
+        # the latest weekly bar moves while its week is still trading, so overwrite the range rather than merging
+        db.session.execute(delete(StockPrice).where(StockPrice.symbol == symbol,
+                                                    StockPrice.date >= min(day for day, _ in bars)))
+        closes = dict(bars) # one close per date, the last one wins
+        db.session.execute(insert(StockPrice), [
+            {"symbol": symbol, "date": day, "close": close} for day, close in closes.items()
+        ])
+        stored.last_bar_date = max(closes)
+
+def _sync_symbol(app, symbol: str, since) -> int:
+    """fetch the symbol's new bars and store them. Runs on the fetch pool, so it pushes its own app context"""
+    config = app.config
+    try:
+        bars = fetch_yahoo_history(symbol, config.get("YAHOO_CHART_URL") or YAHOO_CHART_URL,
+                                   config.get("STOCK_FETCH_TIMEOUT", 10), since)
+    # every outcome has to reach the breaker, or a half-open trial that ends any other way keeps it shut for good
+    except requests.RequestException: # before ValueError: an unparseable body is both, and is upstream trouble
+        _breaker.record_failure()
+        raise
+    except ValueError:
+        _breaker.record_success() # Yahoo answered, it just has no data for this symbol
+        raise
+    except Exception: # a malformed payload (KeyError, TypeError, ...)
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+
+    with app.app_context():
+        try:
+            _store_history(symbol, bars, _utcnow())
+            db.session.commit()
+        except IntegrityError:
+            # another worker stored the same symbol at the same moment, its rows are just as good
+            db.session.rollback()
+    return len(bars)
+
+def _fetch_coalesced(symbol: str, since):
+    """
+    Future for the symbol's fetch-and-store job, joining the one already in flight if there is one.
+    None when the circuit breaker is open and no call should be made.
+    """
+    global _executor, _breaker
+    config = current_app.config
+    with _lock:
+        future = _in_flight.get(symbol)
+        if future is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.get("STOCK_FETCH_WORKERS", 8),
+                                               thread_name_prefix="stock-fetch")
+                _breaker = CircuitBreaker(config.get("STOCK_BREAKER_THRESHOLD", 3),
+                                          config.get("STOCK_BREAKER_COOLDOWN", 300))
+            if not _breaker.allow():
+                return None
+            future = _executor.submit(_sync_symbol, current_app._get_current_object(), symbol, since)
+            _in_flight[symbol] = future
+            future.add_done_callback(lambda done, symbol=symbol: _forget(symbol, done))
+        return future
+
+def _error_message(e) -> str:
+    return f"Failed to fetch data: {e}" if isinstance(e, requests.RequestException) else str(e)
+
+def get_price_history(symbols: list, window: str = "6m", now=None) -> dict:
+    """
+    Weekly closes for each symbol over one of the HISTORY_WINDOWS, from the shared StockPrice store.
+
+    Yahoo is only called for symbols never fetched or last fetched more than STOCK_CACHE_TTL seconds ago,
+    and then only for the bars since the newest stored one (the full history the first time), so any window
+    is served from local rows. Everything else is one query.
+
+    With STOCK_STALE_WHILE_REVALIDATE on (the default), a stale symbol that has stored prices is returned
+    straight away and refreshed in the background; only symbols with nothing stored wait for Yahoo, for at
+    most STOCK_FETCH_DEADLINE seconds. While the circuit breaker is open no calls are made at all.
+
+    Returns (prices, stale). prices is {symbol: [{'date', 'close'}, ...]}, with a '<symbol>_error' message
+    instead for symbols that are invalid or couldn't be fetched, keyed by the symbol exactly as requested
+    (that's what the chart looks up). stale is True whenever stored prices are returned in place of a fresh
+    fetch; it's kept out of prices, where it could clash with a symbol.
+    """
+    if window not in HISTORY_WINDOWS:
+        raise ValueError(f"Unknown range '{window}'. Use one of: {', '.join(HISTORY_WINDOWS)}.")
+    now = now or _utcnow()
+    config = current_app.config
+    ttl = timedelta(seconds=config.get("STOCK_CACHE_TTL", 12 * 3600))
+    deadline = config.get("STOCK_FETCH_DEADLINE", 8)
+    revalidate_in_background = config.get("STOCK_STALE_WHILE_REVALIDATE", True)
+
+    requested = {}
+    result = {}
+    for raw in symbols:
+        symbol = normalize_symbol(raw)
+        if symbol is None:
+            result[f"{raw}_error"] = "Invalid symbol"
+        else:
+            requested[raw] = symbol
+
+    fetched = {}
+    last_bars = {}
+    for symbol, fetched_at, last_bar_date in db.session.execute(
+            select(StockSymbol.symbol, StockSymbol.fetched_at, StockSymbol.last_bar_date)
+            .where(StockSymbol.symbol.in_(set(requested.values())))):
+        fetched[symbol] = fetched_at
+        last_bars[symbol] = last_bar_date
+
+    # start every stale symbol's fetch at once, then wait only for the ones with nothing stored yet.
+    # Incremental fetches start a week before the newest bar, since that bar may have been a week still in progress.
+    waiting = {}
+    failed = {}
+    stale = False
+    for symbol in sorted(set(requested.values())):
+        if fetched.get(symbol) is not None and now - fetched[symbol] <= ttl:
+            continue # fresh, served from the store
+        has_prices = last_bars.get(symbol) is not None
+        future = _fetch_coalesced(symbol, last_bars[symbol] - timedelta(days=7) if has_prices else None)
+        if future is None:
+            if has_prices:
+                stale = True
+            else:
+                failed[symbol] = "Yahoo Finance is unavailable right now, please try again in a few minutes"
+        elif has_prices and revalidate_in_background:
+            stale = True # the refresh carries on after this response
+        else:
+            waiting[symbol] = future
+
+    with timed("http"): # the fetches run on the pool, so what the request spends on Yahoo is this wait
+        done, _ = wait(waiting.values(), timeout=deadline)
+    for symbol, future in waiting.items():
+        if future in done and future.exception() is None:
+            continue
+        # failed, or left running (a later request for the symbol joins it while it's still in flight)
+        if last_bars.get(symbol) is not None:
+            stale = True # keep serving what's stored
+        elif future in done:
+            failed[symbol] = _error_message(future.exception())
+        else:
+            failed[symbol] = f"Timed out after {deadline}s waiting for Yahoo Finance"
+
+    history = {}
+    rows = db.session.execute(
+        select(StockPrice.symbol, StockPrice.date, StockPrice.close)
+        .where(StockPrice.symbol.in_(set(requested.values())),
+               StockPrice.date >= now.date() - timedelta(days=HISTORY_WINDOWS[window]))
+        .order_by(StockPrice.symbol, StockPrice.date)
+    )
+    for symbol, day, close in rows:
+        history.setdefault(symbol, []).append({'date': day.isoformat(), 'close': close})
+
+    for raw, symbol in requested.items():
+        if symbol in failed:
+            result[f"{raw}_error"] = failed[symbol]
+        else:
+            result[raw] = history.get(symbol, [])
+    return result, stale
@@ -0,0 +1,56 @@
+// Balance forecast chart: median projection with 10th-90th and 25th-75th percentile bands from /api/forecast
+document.addEventListener('DOMContentLoaded', function() {
+    const canvas = document.getElementById('balanceForecastChart');
+    if (!canvas) return;
+
+    fetch('/api/forecast?years=1')
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                console.error('Forecast error:', data.error);
+                return;
+            }
+
+            // Summary line under the heading
+            const summary = document.getElementById('forecast-summary');
+            if (summary) {
+                const chance = Math.round(data.probability_above_min_goal * 100);
+                summary.textContent = `${chance}% chance of staying above your minimum balance goal of $${data.min_balance_goal.toFixed(2)} over the next year.`;
+            }
+
+            const bands = data.bands;
+            new Chart(canvas.getContext('2d'), {
+                type: 'line',
+                data: {
+                    labels: data.weeks,
+                    datasets: [
+                        // each band is drawn as an upper line filled down to the lower line before it
+                        { label: '10th percentile', data: bands.p10, borderWidth: 0, pointRadius: 0, fill: false },
+                        { label: '10th-90th', data: bands.p90, borderWidth: 0, pointRadius: 0, fill: '-1', backgroundColor: '#33cc3322' },
+                        { label: '25th percentile', data: bands.p25, borderWidth: 0, pointRadius: 0, fill: false },
+                        { label: '25th-75th', data: bands.p75, borderWidth: 0, pointRadius: 0, fill: '-1', backgroundColor: '#00993344' },
+                        { label: 'Median', data: bands.p50, borderColor: '#006600', pointRadius: 0, fill: false, tension: 0.1 },
+                        { label: 'Min balance goal', data: data.weeks.map(() => data.min_balance_goal), borderColor: '#e74c3c', borderDash: [6, 4], pointRadius: 0, fill: false }
+                    ]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    animation: { duration: 500 },
+                    plugins: {
+                        legend: {
+                            position: 'bottom',
+                            // hide the lower edge of each band from the legend
+                            labels: { filter: item => !item.text.endsWith('percentile') }
+                        },
+                        tooltip: { mode: 'index', intersect: false }
+                    },
+                    scales: {
+                        x: { title: { display: true, text: 'Week ending' } },
+                        y: { title: { display: true, text: 'Balance ($)' } }
+                    }
+                }
+            });
+        })
+        .catch(error => console.error('Error fetching forecast:', error));
+});
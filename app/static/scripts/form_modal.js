@@ -124,8 +124,10 @@ function renumber(tableId, prefix){
       tab.addEventListener('shown.bs.tab', e => {
         const target = e.target.getAttribute('data-bs-target');
         // show/hide buttons based on active tab
-        document.getElementById('save-button').style.display = target === '#deposit' ? 'none' : 'block';
+        const separate = target === '#deposit' || target === '#import';
+        document.getElementById('save-button').style.display = separate ? 'none' : 'block';
         document.getElementById('deposit-button').style.display = target === '#deposit' ? 'block' : 'none';
+        document.getElementById('import-button').style.display = target === '#import' ? 'block' : 'none';
       });
     });
   });
\ No newline at end of file
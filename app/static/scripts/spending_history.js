@@ -0,0 +1,52 @@
+// "Load older" for the Spending Activity list. The dashboard renders the most recent page only;
+// each click fetches the next page from /api/spendings using the cursor the previous page returned.
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('load-older-spendings');
+    const list = document.getElementById('spending-list');
+    if (!button || !list) return;
+
+    button.addEventListener('click', function() {
+        button.disabled = true;
+        fetch('/api/spendings?before=' + encodeURIComponent(button.dataset.next))
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) throw new Error(data.error);
+
+                data.spendings.forEach(s => list.appendChild(spendingItem(s)));
+
+                if (data.next) {
+                    button.dataset.next = data.next;
+                    button.disabled = false;
+                } else {
+                    button.remove(); // reached the oldest spending
+                }
+            })
+            .catch(error => {
+                console.error('Error loading older spendings:', error);
+                button.disabled = false;
+            });
+    });
+});
+
+// Same markup as the server-rendered list items. textContent so item names can't inject HTML.
+function spendingItem(s) {
+    const li = document.createElement('li');
+    li.className = 'spending-item';
+
+    const details = document.createElement('div');
+    details.className = 'spending-details';
+    const name = document.createElement('span');
+    name.className = 'spending-item-name';
+    name.textContent = s.item;
+    const amount = document.createElement('span');
+    amount.className = 'spending-amount';
+    amount.textContent = '$' + s.amount;
+    details.append(name, amount);
+
+    const date = document.createElement('span');
+    date.className = 'spending-date';
+    date.textContent = s.date;
+
+    li.append(details, date);
+    return li;
+}
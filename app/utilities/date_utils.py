@@ -12,4 +12,34 @@ def get_effective_date():
     
     if days_offset:
         return today + timedelta(days=days_offset)
-    return today
\ No newline at end of file
+    return today
+
+SUMMARY_GRANULARITIES = ("day", "week", "month")
+
+def _add_months(d, months):
+    """first day of the month `months` away from d's month (negative goes back)"""
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def summary_periods(granularity, periods, today):
+    """
+    Build (start, end) date pairs for a summary chart, oldest first. Both ends are inclusive.
+        day   - one bucket per day, the last one being today
+        week  - rolling 7-day windows, the last one ending today (matches the original weekly summary)
+        month - calendar months, the last one being the current month (ends on its last day)
+    """
+    if granularity not in SUMMARY_GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Use one of: {', '.join(SUMMARY_GRANULARITIES)}.")
+
+    buckets = []
+    for i in reversed(range(periods)):
+        if granularity == "day":
+            start = end = today - timedelta(days=i)
+        elif granularity == "week":
+            end = today - timedelta(days=i * 7)
+            start = end - timedelta(days=6)
+        else:
+            start = _add_months(today, -i)
+            end = _add_months(start, 1) - timedelta(days=1)
+        buckets.append((start, end))
+    return buckets
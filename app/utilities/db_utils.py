@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+def dialect_insert(table):
+    """
+    INSERT for the session's database, with on_conflict_do_update / on_conflict_do_nothing.
+    The app runs on Postgres in production and SQLite locally; both spell ON CONFLICT the same way.
+    """
+    if db.session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
@@ -0,0 +1,127 @@
+"""
+Compare the old relationship-walking BudgetManager metrics against the SQL AccountSnapshot.
+
+Run from the project root:
+    python benchmarks/bench_account_snapshot.py
+    python benchmarks/bench_account_snapshot.py --sizes 1000 10000 --repeat 3
+
+Uses a throwaway SQLite database, so it doesn't need the .env DATABASE_URL.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from app import create_app, db
+from app.calculations import BudgetManager
+from app.services.spending_rollup import rebuild_rollups
+from app.models import User, Account, RecurringExpense, Spending, SavingsGoal, SavingsDeposit, Asset, Investment
+from config import Config
+
+
+class BenchConfig(Config):
+    SECRET_KEY = 'bench'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed_account(n_spendings: int) -> int:
+    """create one account with n_spendings spending rows plus a handful of other rows, return its id"""
+    rng = random.Random(n_spendings)
+    user = User(name='Bench', email=f'bench{n_spendings}@example.com', password='x')
+    db.session.add(user)
+    db.session.flush()
+    account = Account(user_id=user.id, current_balance=5000.0, min_balance_goal=500.0,
+                      weekly_spending_limit=0.0, hourly_wage=25.0, hours_per_week=30.0)
+    db.session.add(account)
+    db.session.flush()
+
+    start = date.today() - timedelta(days=3 * 365)
+    db.session.execute(insert(Spending), [
+        {'item': f'Item {i}', 'amount': round(rng.uniform(1, 120), 2),
+         'date': start + timedelta(days=rng.randrange(3 * 365)), 'account_id': account.id}
+        for i in range(n_spendings)
+    ])
+    for i, freq in enumerate(['daily', 'weekly', 'monthly'] * 4):
+        db.session.add(RecurringExpense(name=f'Expense {i}', amount=rng.uniform(5, 200), frequency=freq, account_id=account.id))
+    for i in range(10):
+        db.session.add(Asset(name=f'Asset {i}', value=rng.uniform(100, 10000), account_id=account.id))
+        db.session.add(Investment(stock_name=f'SYM{i}', amount=rng.uniform(100, 5000), account_id=account.id))
+    for i in range(10):
+        goal = SavingsGoal(item=f'Goal {i}', cost=1000.0, saved_total=0.0, account_id=account.id)
+        db.session.add(goal)
+        db.session.flush()
+        for _ in range(20):
+            amount = rng.uniform(1, 40)
+            db.session.add(SavingsDeposit(amount=amount, savings_goal_id=goal.id))
+            goal.saved_total += amount
+    db.session.commit()
+    rebuild_rollups(account.id) # the bulk insert above bypasses the incremental rollup updates
+    return account.id
+
+
+def legacy_metrics(account_id: int):
+    """the pre-snapshot implementation: load every child row and sum in Python"""
+    account = db.session.get(Account, account_id)
+    weekly_expenses = 0.0
+    for exp in account.expenses:
+        if exp.frequency == 'weekly':
+            weekly_expenses += exp.amount
+        elif exp.frequency == 'monthly':
+            weekly_expenses += exp.amount / 4
+        elif exp.frequency == 'daily':
+            weekly_expenses += exp.amount * 7
+    total_spending = sum(s.amount for s in account.spendings)
+    net_worth = (account.current_balance + sum(a.value for a in account.assets)
+                 + sum(i.amount for i in account.investments) - total_spending)
+    saved = [sum(d.amount for d in g.deposits) for g in account.savings_goals]
+    return round(net_worth, 2), round(weekly_expenses, 2), round(sum(saved), 2)
+
+
+def snapshot_metrics(account_id: int):
+    bm = BudgetManager(db.session, account_id)
+    net_worth = bm.calculate_net_worth()
+    weekly_expenses = bm.calculate_weekly_expenses()
+    bm.calculate_health_score()
+    bm.item_progress_report()
+    return round(net_worth, 2), round(weekly_expenses, 2), round(bm.snapshot.total_saved, 2)
+
+
+def best_of(fn, account_id: int, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        db.session.expire_all() # start every run cold, like a fresh request
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = fn(account_id)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        print(f"{'spendings':>10} {'legacy ms':>10} {'snapshot ms':>12} {'speedup':>8}")
+        for size in args.sizes:
+            account_id = seed_account(size)
+            legacy_time, legacy_result = best_of(legacy_metrics, account_id, args.repeat)
+            snap_time, snap_result = best_of(snapshot_metrics, account_id, args.repeat)
+            if any(abs(a - b) > 0.05 for a, b in zip(legacy_result, snap_result)):
+                raise SystemExit(f"results differ at {size}: legacy={legacy_result} snapshot={snap_result}")
+            print(f"{size:>10} {legacy_time * 1000:>10.1f} {snap_time * 1000:>12.1f} {legacy_time / snap_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare entering spendings one commit at a time against one BudgetManager.batch() unit of work.
+
+Run from the project root:
+    python benchmarks/bench_batch_spending.py
+    python benchmarks/bench_batch_spending.py --sizes 10 50 500
+
+Uses a throwaway SQLite file database (so every commit is a real fsync), not the .env DATABASE_URL.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, select
+from app import create_app, db
+from app.calculations import BudgetManager
+from app.models import User, Account, Spending
+from config import Config
+
+
+class BenchConfig(Config):
+    SECRET_KEY = 'bench'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed_account(label: str) -> int:
+    """an empty account with plenty of money, return its id"""
+    user = User(name='Bench', email=f'bench-{label}@example.com', password='x')
+    db.session.add(user)
+    db.session.flush()
+    account = Account(user_id=user.id, current_balance=1_000_000.0, min_balance_goal=0.0, weekly_spending_limit=0.0)
+    db.session.add(account)
+    db.session.commit()
+    return account.id
+
+
+def purchases(n: int):
+    rng = random.Random(n)
+    return [(f'Item {i}', round(rng.uniform(1, 120), 2), date.today() - timedelta(days=rng.randrange(60)))
+            for i in range(n)]
+
+
+def one_commit_each(bm: BudgetManager, rows):
+    for item, amount, day in rows:
+        bm.make_personal_spend(item, amount, day)
+
+
+def batched(bm: BudgetManager, rows):
+    with bm.batch():
+        for item, amount, day in rows:
+            bm.make_personal_spend(item, amount, day)
+
+
+def run(fn, size: int, counters: dict):
+    account_id = seed_account(f'{fn.__name__}-{size}')
+    rows = purchases(size)
+    db.session.expunge_all()
+    bm = BudgetManager(db.session, account_id)
+
+    counters.update(commits=0, statements=0)
+    started = time.perf_counter()
+    fn(bm, rows)
+    elapsed = time.perf_counter() - started
+    commits, statements = counters['commits'], counters['statements']
+
+    # both modes must leave the same balance and the same rows behind
+    balance = db.session.get(Account, account_id).current_balance
+    count = db.session.execute(select(func.count(Spending.id)).where(Spending.account_id == account_id)).scalar()
+    return elapsed, commits, statements, round(balance, 2), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200, 1000])
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+
+        counters = {'commits': 0, 'statements': 0}
+        event.listen(db.engine, 'commit', lambda conn: counters.__setitem__('commits', counters['commits'] + 1))
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: counters.__setitem__('statements', counters['statements'] + 1))
+
+        print(f"{'spendings':>10} {'mode':>8} {'ms':>9} {'commits':>8} {'statements':>11}")
+        for size in args.sizes:
+            single = run(one_commit_each, size, counters)
+            batch = run(batched, size, counters)
+            if single[3:] != batch[3:]:
+                raise SystemExit(f"results differ at {size}: single={single[3:]} batch={batch[3:]}")
+            for mode, (elapsed, commits, statements, _, _) in (('single', single), ('batch', batch)):
+                print(f"{size:>10} {mode:>8} {elapsed * 1000:>9.1f} {commits:>8} {statements:>11}")
+            print(f"{'':>10} {'speedup':>8} {single[0] / batch[0]:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
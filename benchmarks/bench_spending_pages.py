@@ -0,0 +1,118 @@
+"""
+Page latency of the keyset-paginated spending history (/api/spendings) at different depths,
+against OFFSET pagination over the same ordering.
+
+Run from the project root:
+    python benchmarks/bench_spending_pages.py
+    python benchmarks/bench_spending_pages.py --rows 100000 --repeat 10
+
+Uses a throwaway SQLite database, so it doesn't need the .env DATABASE_URL.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, text
+from app import create_app, db
+from app.models import User, Account, Spending
+from app.services.spending_history import encode_cursor, spending_page
+from config import Config
+
+
+class BenchConfig(Config):
+    SECRET_KEY = 'bench'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+
+def seed_account(n_rows: int, chunk: int = 50_000) -> int:
+    """one account with n_rows spendings spread over ten years (plus a second account so the index has to filter)"""
+    rng = random.Random(n_rows)
+    ids = []
+    for label in ('bench', 'other'):
+        user = User(name='Bench', email=f'{label}@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        account = Account(user_id=user.id, current_balance=0.0, min_balance_goal=0.0, weekly_spending_limit=0.0)
+        db.session.add(account)
+        db.session.flush()
+        ids.append(account.id)
+
+    start = date.today() - timedelta(days=3650)
+    items = ['Groceries', 'Coffee', 'Fuel', 'Lunch', 'Books', 'Cinema', 'Pharmacy', 'Taxi']
+    for offset in range(0, n_rows, chunk):
+        db.session.execute(insert(Spending), [
+            {'item': f'{rng.choice(items)} {i}', 'amount': round(rng.uniform(1, 120), 2),
+             'date': start + timedelta(days=rng.randrange(3650)), 'account_id': ids[i % 10 == 0]}
+            for i in range(offset, min(offset + chunk, n_rows))
+        ])
+        db.session.commit()
+        print(f"  seeded {min(offset + chunk, n_rows):,} rows", end='\r', flush=True)
+    print()
+    return ids[0]
+
+
+def cursor_at(account_id: int, position: int):
+    """keyset cursor that starts a page at `position` rows into the history (setup only, uses OFFSET once)"""
+    if position == 0:
+        return None
+    row = db.session.execute(
+        select(Spending.date, Spending.id).where(Spending.account_id == account_id)
+        .order_by(Spending.date.desc(), Spending.id.desc()).offset(position - 1).limit(1)
+    ).one()
+    return encode_cursor(row.date, row.id)
+
+
+def offset_page(account_id: int, position: int, limit: int):
+    return db.session.execute(
+        select(Spending.id, Spending.item, Spending.amount, Spending.date).where(Spending.account_id == account_id)
+        .order_by(Spending.date.desc(), Spending.id.desc()).offset(position).limit(limit)
+    ).all()
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        account_id = seed_account(args.rows)
+        total = db.session.execute(text("SELECT COUNT(*) FROM spending WHERE account_id = :a"), {'a': account_id}).scalar()
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM spending WHERE account_id = :a AND (date, id) < (:d, :i) "
+            "ORDER BY date DESC, id DESC LIMIT 51"), {'a': account_id, 'd': date.today(), 'i': 1}).all()
+        print("keyset plan:", '; '.join(row[-1] for row in plan))
+
+        print(f"{total:,} rows in the account, {args.limit} per page")
+        print(f"{'depth':>8} {'keyset ms':>10} {'offset ms':>10} {'filtered ms':>12}")
+        for fraction in (0, 0.1, 0.5, 0.9, 0.999):
+            position = int(total * fraction)
+            cursor = cursor_at(account_id, position)
+            keyset = best_ms(lambda: spending_page(account_id, cursor, args.limit), args.repeat)
+            offset = best_ms(lambda: offset_page(account_id, position, args.limit), args.repeat)
+            filtered = best_ms(lambda: spending_page(account_id, cursor, args.limit, text='coffee',
+                                                     min_amount=20), args.repeat)
+            print(f"{fraction:>8.1%} {keyset:>10.2f} {offset:>10.2f} {filtered:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Benchmark suite over synthetic accounts: the dashboard data, form sync, recurring expense processing,
+savings and summary calculations, and the main HTTP routes through the Flask test client, as JSON.
+
+Run from the project root:
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --today 2026-10-18   # % change of each median
+    python benchmarks/bench_suite.py --users 5 --years 10 --repeat 20 --only http_
+
+Uses a throwaway SQLite database filled by synthetic_data.generate() with a fixed seed, so two runs on the
+same machine with the same --today (default: today, recorded in the output) work on identical data. The
+routes are run at that date through the dashboard's date simulation offset.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy
+from sqlalchemy import event
+from wtforms import BooleanField, FieldList, FormField
+from app import create_app, db
+from app.forms import FinancialForm
+from app.models import Account, User
+from app.services import account as account_svc
+from app.services import dashboard_data as dashboard_svc
+from app.services import expense_processor as expense_svc
+from app.services import registry
+from config import Config
+from synthetic_data import PASSWORD, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BenchConfig(Config):
+    SECRET_KEY = 'bench'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    WTF_CSRF_ENABLED = False # the test client posts forms without fetching a token first
+    DASHBOARD_CACHE_BACKEND = 'memory'
+    METRICS_DIR = None
+
+
+class SQLCounter:
+    """statements run on the engine, counted with a cursor event"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def measure(fn, repeat: int, warmup: int, counter: SQLCounter, setup=None) -> dict:
+    """run fn warmup + repeat times (setup() before each, untimed) and summarise the timed runs"""
+    timings, statements = [], []
+    for run in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        before = counter.count
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+            statements.append(counter.count - before)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "sql_statements": statistics.median(statements),
+    }
+
+
+def form_payload(form) -> dict:
+    """the POST body a browser would send for this form, nested FieldLists flattened to their field names"""
+    payload = {}
+    for field in form:
+        if isinstance(field, (FieldList, FormField)):
+            payload.update(form_payload(field))
+        elif isinstance(field, BooleanField):
+            if field.data:
+                payload[field.name] = 'y'
+        elif field.type not in ('SubmitField', 'CSRFTokenField'):
+            value = field._value() if hasattr(field, '_value') else field.data # select fields have no _value()
+            payload[field.name] = '' if value is None else str(value)
+    return payload
+
+
+def prefilled_form(app, account_id: int) -> FinancialForm:
+    """the dashboard's FinancialForm for an account, as the page renders it"""
+    with app.test_request_context():
+        account = db.session.get(Account, account_id)
+        form = FinancialForm(data=account_svc.financial_form_data(account))
+        account_svc.prefill_financial_form(form, account)
+        return form
+
+
+def nudge_first_spending(payload: dict) -> dict:
+    """toggle the first spending's amount by a cent, so every save really updates a row"""
+    key = 'spendings-0-amount'
+    if key in payload:
+        amount = float(payload[key])
+        payload[key] = str(round(amount + 0.01 if round(amount * 100) % 2 == 0 else amount - 0.01, 2))
+    return payload
+
+
+def function_benchmarks(app, account_id: int, scratch_id: int, today: date, args, counter) -> dict:
+    """service-level timings. Each run gets a fresh request context, so request-scoped caches start empty."""
+    results = {}
+
+    def in_request(fn):
+        def run():
+            with app.test_request_context():
+                fn(db.session.get(Account, account_id))
+        return run
+
+    cache = app.extensions["dashboard_cache"] # BenchConfig keeps the memory cache on
+    results["dashboard_data_cold"] = measure(
+        in_request(lambda account: dashboard_svc.get_dashboard_data(account, today)),
+        args.repeat, args.warmup, counter, setup=cache.backend.clear)
+    results["dashboard_data_cached"] = measure(
+        in_request(lambda account: dashboard_svc.get_dashboard_data(account, today)),
+        args.repeat, args.warmup, counter)
+    results["weeks_to_save_all"] = measure(
+        in_request(lambda account: registry.get_budget_manager(account.id).weeks_to_save_all()),
+        args.repeat, args.warmup, counter)
+    results["weekly_summary_4w"] = measure(
+        in_request(lambda account: registry.get_budget_manager(account.id).get_weekly_summary(4, today)),
+        args.repeat, args.warmup, counter)
+    results["weekly_summary_52w"] = measure(
+        in_request(lambda account: registry.get_budget_manager(account.id).get_weekly_summary(52, today)),
+        args.repeat, args.warmup, counter)
+
+    payload = form_payload(prefilled_form(app, account_id))
+
+    def sync():
+        with app.test_request_context(method='POST', data=nudge_first_spending(payload)):
+            account = db.session.get(Account, account_id)
+            account_svc.sync_financial_form(FinancialForm(), account)
+            db.session.commit()
+    results["sync_financial_form"] = measure(sync, args.repeat, args.warmup, counter)
+
+    # on its own account: each run moves the date on a week, so there is always a week of charges to post
+    days = iter(range(7, 7 * (args.warmup + args.repeat + 1), 7))
+
+    def process():
+        with app.test_request_context():
+            expense_svc.process_recurring_expenses(db.session.get(Account, scratch_id), today + timedelta(days=next(days)))
+            db.session.commit()
+    results["process_recurring_expenses_week"] = measure(process, args.repeat, args.warmup, counter)
+    return results
+
+
+def http_benchmarks(app, email: str, account_id: int, today: date, args, counter) -> dict:
+    """route timings through the test client, logged in as one synthetic user (read-only routes first)"""
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise SystemExit(f"Could not log in as {email} (status {response.status_code}).")
+    with client.session_transaction() as session:
+        session['date_simulation_offset'] = (today - date.today()).days # the routes' get_effective_date() is `today`
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise SystemExit(f"GET {url} returned {response.status_code}.")
+            response.get_data() # drain streamed responses
+        return run
+
+    routes = [
+        ("http_dashboard", '/dashboard'),
+        ("http_weekly_summary", '/weekly-summary'),
+        ("http_weekly_summary_52w", '/weekly-summary?periods=52'),
+        ("http_savings_timeline", '/api/savings-timeline'),
+        ("http_spendings_page", '/api/spendings'),
+        ("http_spendings_filtered", '/api/spendings?q=Coffee&min_amount=5'),
+        ("http_forecast", '/api/forecast?seed=1'),
+        ("http_export_spendings_csv", '/api/export/spendings?format=csv'),
+    ]
+    results = {name: measure(get(url), args.repeat, args.warmup, counter) for name, url in routes}
+
+    payload = form_payload(prefilled_form(app, account_id))
+
+    def save():
+        response = client.post('/dashboard/save', data=nudge_first_spending(payload))
+        if response.status_code != 302:
+            raise SystemExit(f"POST /dashboard/save returned {response.status_code}.")
+    results["http_dashboard_save"] = measure(save, args.repeat, args.warmup, counter)
+    results["http_dashboard_after_save"] = measure(get('/dashboard'), args.repeat, args.warmup, counter,
+                                                   setup=lambda: client.post('/dashboard/save', data=nudge_first_spending(payload)))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str, today: date):
+    with open(baseline_path) as f:
+        report = json.load(f)
+    baseline = report["results"]
+    if report["meta"].get("today") != today.isoformat():
+        print(f"Warning: the baseline ran with --today {report['meta'].get('today')}, this run with {today.isoformat()}, "
+              f"so they didn't use the same data.", file=sys.stderr)
+    print(f"{'benchmark':<34} {'base ms':>10} {'now ms':>10} {'change':>8} {'sql':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {'-':>10} {result['median_ms']:>10.2f} {'new':>8} {result['sql_statements']:>9}")
+            continue
+        change = (result['median_ms'] - base['median_ms']) / base['median_ms'] if base['median_ms'] else 0.0
+        sql = f"{base['sql_statements']}->{result['sql_statements']}"
+        print(f"{name:<34} {base['median_ms']:>10.2f} {result['median_ms']:>10.2f} {change:>+8.1%} {sql:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--spendings-per-week', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--only', default=None, help='run the benchmarks whose name starts with this')
+    parser.add_argument('--output', default=None, help='write the JSON here instead of stdout')
+    parser.add_argument('--compare', default=None, help='a previous --output file to compare medians against')
+    parser.add_argument('--today', type=date.fromisoformat, default=None,
+                        help="YYYY-MM-DD to generate the data and run the routes at, default: today. Use the baseline's for --compare")
+    args = parser.parse_args()
+
+    today = args.today or date.today()
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        data = generate(users=max(args.users, 2), years=args.years, spendings_per_week=args.spendings_per_week,
+                        seed=args.seed, today=today)
+        account_id, scratch_id = data["account_ids"][0], data["account_ids"][-1]
+        email = db.session.get(User, db.session.get(Account, account_id).user_id).email
+        counter = SQLCounter(db.engine)
+    print(f"Generated {sum(data['rows'].values()):,} rows in {data['seconds']:.1f}s.", file=sys.stderr)
+
+    results = {}
+    if not args.only or not args.only.startswith('http'):
+        results.update(function_benchmarks(app, account_id, scratch_id, today, args, counter))
+    if not args.only or 'http_'.startswith(args.only) or args.only.startswith('http'):
+        results.update(http_benchmarks(app, email, account_id, today, args, counter))
+    if args.only:
+        results = {name: result for name, result in results.items() if name.startswith(args.only)}
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": "sqlite",
+            "today": today.isoformat(),
+            "seed": args.seed,
+            "users": max(args.users, 2),
+            "years": args.years,
+            "rows": data["rows"],
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}.", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare, today)
+
+
+if __name__ == '__main__':
+    main()
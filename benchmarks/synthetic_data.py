@@ -0,0 +1,165 @@
+"""
+Seeded generator of realistic accounts: users with recurring expenses, years of spending history,
+savings goals with deposits, assets and investments, written with bulk inserts.
+
+Run from the project root to fill a database (tables must exist, e.g. after `flask db upgrade`):
+    python benchmarks/synthetic_data.py --database-url sqlite:///synthetic.db --users 50 --years 5
+    python benchmarks/synthetic_data.py --users 5 --seed 7      # uses the .env DATABASE_URL
+
+Every generated user can log in as user<N>@synthetic.example with the password "password".
+The same seed and --today always produce the same rows. bench_suite.py imports generate() from here.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from app import bcrypt, create_app, db
+from app.models import User, Account, RecurringExpense, Spending, SavingsGoal, SavingsDeposit, Asset, Investment
+from app.services.spending_rollup import rebuild_rollups
+from config import Config
+
+EMAIL_DOMAIN = "synthetic.example"
+PASSWORD = "password"
+INSERT_CHUNK = 10_000 # rows per executemany
+
+# (item, low, high) price ranges, picked with the weights below
+PURCHASES = [("Groceries", 20, 160), ("Coffee", 3, 7), ("Lunch", 9, 25), ("Fuel", 30, 90), ("Pharmacy", 5, 60),
+             ("Books", 10, 45), ("Cinema", 12, 30), ("Taxi", 8, 40), ("Clothing", 25, 150), ("Hardware store", 10, 120)]
+PURCHASE_WEIGHTS = [20, 25, 18, 8, 5, 4, 4, 6, 4, 6]
+EXPENSES = [("Rent", "monthly", 700, 2200), ("Phone", "monthly", 25, 90), ("Internet", "monthly", 40, 90),
+            ("Gym", "monthly", 20, 70), ("Streaming", "monthly", 8, 25), ("Insurance", "monthly", 60, 250),
+            ("Transit pass", "weekly", 15, 40), ("Cleaner", "weekly", 40, 90), ("Parking", "daily", 3, 15),
+            ("Coffee subscription", "weekly", 5, 15)]
+GOALS = ["Laptop", "Vacation", "New bike", "Emergency fund", "Camera", "Couch", "Concert tickets", "Guitar"]
+ASSETS = ["Car", "Savings account", "Jewellery", "Collectibles", "Bonds", "Motorbike"]
+TICKERS = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "VTI", "VOO", "BRK-B", "JPM"]
+
+
+def _pick(rng, options: list, n: int) -> list:
+    """n distinct-looking picks: the options in random order, numbered once they start repeating"""
+    picks = []
+    while len(picks) < n:
+        rnd = len(picks) // len(options)
+        for option in rng.sample(options, len(options))[:n - len(picks)]:
+            if rnd:
+                option = (f"{option[0]} {rnd + 1}", *option[1:]) if isinstance(option, tuple) else f"{option} {rnd + 1}"
+            picks.append(option)
+    return picks
+
+
+def _chunked_insert(model, rows):
+    """Core executemany in chunks, so huge histories don't build one giant parameter list"""
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(model.__table__), rows[start:start + INSERT_CHUNK])
+
+
+def generate(users: int = 10, years: int = 3, spendings_per_week: int = 15, expenses: int = 8, goals: int = 4,
+             deposits_per_goal: int = 12, assets: int = 3, investments: int = 4, seed: int = 1, today=None) -> dict:
+    """
+    Create `users` users, each with one account and the given number of rows, and commit.
+    Spendings cover `years` years up to `today` (about spendings_per_week a week, at random).
+
+    Data stays consistent with what the app maintains itself: goal saved_totals equal their deposits,
+    rollups are rebuilt from the spendings, and expenses are processed through today, so a first visit
+    doesn't back-charge years of recurring expenses.
+
+    Returns {'account_ids': [...], 'rows': {model name: count}, 'seconds': ...}.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    started = time.perf_counter()
+    first = db.session.execute(select(db.func.count(User.id)).where(User.email.like(f"%@{EMAIL_DOMAIN}"))).scalar()
+    password = bcrypt.generate_password_hash(PASSWORD).decode() # hashed once, bcrypt is slow on purpose
+
+    user_ids = db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+        {"name": f"User {first + i}", "email": f"user{first + i}@{EMAIL_DOMAIN}", "password": password}
+        for i in range(users)
+    ]).all()
+    account_ids = db.session.scalars(insert(Account).returning(Account.id, sort_by_parameter_order=True), [
+        {"user_id": user_id, "current_balance": round(rng.uniform(5_000, 50_000), 2),
+         "min_balance_goal": rng.choice([0.0, 500.0, 1000.0, 2500.0]), "weekly_spending_limit": 0.0,
+         "hourly_wage": round(rng.uniform(15, 60), 2), "hours_per_week": rng.choice([20.0, 30.0, 37.5, 40.0]),
+         "pay_frequency": rng.choice(["weekly", "biweekly"]), "pay_day_of_week": 4, "last_pay_credit": today}
+        for user_id in user_ids
+    ]).all()
+
+    counts = {"User": users, "Account": users}
+    expense_rows, spending_rows, deposit_rows, asset_rows, investment_rows = [], [], [], [], []
+    goal_rows, goal_deposits = [], []
+    days = years * 365
+    start = today - timedelta(days=days - 1)
+    for account_id in account_ids:
+        for name, frequency, low, high in _pick(rng, EXPENSES, expenses):
+            expense_rows.append({"name": name, "amount": round(rng.uniform(low, high), 2), "frequency": frequency,
+                                 "processed_through": today, "account_id": account_id})
+
+        for _ in range(days * spendings_per_week // 7):
+            item, low, high = rng.choices(PURCHASES, PURCHASE_WEIGHTS)[0]
+            spending_rows.append({"item": item, "amount": round(rng.uniform(low, high), 2),
+                                  "date": start + timedelta(days=rng.randrange(days)), "account_id": account_id})
+
+        for item in _pick(rng, GOALS, goals):
+            deposits = [(round(rng.uniform(10, 150), 2), start + timedelta(days=rng.randrange(days)))
+                        for _ in range(deposits_per_goal)]
+            goal_rows.append({"item": item, "cost": round(rng.uniform(300, 5000), -1), "purchased": False,
+                              "saved_total": round(sum(amount for amount, _ in deposits), 2), "account_id": account_id})
+            goal_deposits.append(deposits)
+
+        for name in _pick(rng, ASSETS, assets):
+            asset_rows.append({"name": name, "value": round(rng.uniform(500, 30_000), 2), "account_id": account_id})
+        for ticker in _pick(rng, TICKERS, investments):
+            investment_rows.append({"stock_name": ticker, "amount": round(rng.uniform(100, 10_000), 2),
+                                    "account_id": account_id})
+
+    goal_ids = db.session.scalars(insert(SavingsGoal).returning(SavingsGoal.id, sort_by_parameter_order=True),
+                                  goal_rows).all() if goal_rows else []
+    for goal_id, deposits in zip(goal_ids, goal_deposits):
+        deposit_rows += [{"amount": amount, "date": day, "savings_goal_id": goal_id} for amount, day in deposits]
+
+    for model, rows in ((RecurringExpense, expense_rows), (Spending, spending_rows), (SavingsDeposit, deposit_rows),
+                        (Asset, asset_rows), (Investment, investment_rows)):
+        _chunked_insert(model, rows)
+        counts[model.__name__] = len(rows)
+    counts["SavingsGoal"] = len(goal_rows)
+    db.session.commit()
+
+    for account_id in account_ids:
+        rebuild_rollups(account_id) # the bulk insert bypasses the incremental rollup updates; commits
+    return {"account_ids": list(account_ids), "rows": counts, "seconds": time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', default=None, help='default: DATABASE_URL from .env')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--spendings-per-week', type=int, default=15)
+    parser.add_argument('--expenses', type=int, default=8)
+    parser.add_argument('--goals', type=int, default=4)
+    parser.add_argument('--deposits-per-goal', type=int, default=12)
+    parser.add_argument('--assets', type=int, default=3)
+    parser.add_argument('--investments', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--today', type=date.fromisoformat, default=None, help='YYYY-MM-DD, default: today')
+    args = parser.parse_args()
+
+    class SeedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url or Config.SQLALCHEMY_DATABASE_URI
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        result = generate(args.users, args.years, args.spendings_per_week, args.expenses, args.goals,
+                          args.deposits_per_goal, args.assets, args.investments, args.seed, args.today)
+    rows = ", ".join(f"{count:,} {name}" for name, count in result["rows"].items())
+    print(f"Created {rows} in {result['seconds']:.1f}s.")
+    print(f"Log in as user<N>@{EMAIL_DOMAIN} / {PASSWORD}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,4 +7,21 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
\ No newline at end of file
+    ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
+    DASHBOARD_CACHE_BACKEND = os.getenv('DASHBOARD_CACHE_BACKEND', 'memory') # memory | sqlite | none
+    DASHBOARD_CACHE_SIZE = int(os.getenv('DASHBOARD_CACHE_SIZE', 1024)) # max accounts kept
+    DASHBOARD_CACHE_PATH = os.getenv('DASHBOARD_CACHE_PATH') # sqlite file, defaults to instance/dashboard_cache.sqlite
+    STOCK_CACHE_TTL = int(os.getenv('STOCK_CACHE_TTL', 12 * 3600)) # seconds before a symbol's stored prices are refetched
+    YAHOO_CHART_URL = os.getenv('YAHOO_CHART_URL', 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}')
+    STOCK_FETCH_WORKERS = int(os.getenv('STOCK_FETCH_WORKERS', 8)) # concurrent Yahoo calls per worker process
+    STOCK_FETCH_TIMEOUT = float(os.getenv('STOCK_FETCH_TIMEOUT', 10)) # seconds per Yahoo call
+    STOCK_FETCH_DEADLINE = float(os.getenv('STOCK_FETCH_DEADLINE', 8)) # seconds a request waits for all of its symbols
+    STOCK_STALE_WHILE_REVALIDATE = os.getenv('STOCK_STALE_WHILE_REVALIDATE', '1') == '1' # serve stale prices now, refresh in the background
+    STOCK_BREAKER_THRESHOLD = int(os.getenv('STOCK_BREAKER_THRESHOLD', 3)) # consecutive Yahoo failures before calls stop
+    STOCK_BREAKER_COOLDOWN = float(os.getenv('STOCK_BREAKER_COOLDOWN', 300)) # seconds before trying Yahoo again
+    REQUEST_TIMING = os.getenv('REQUEST_TIMING', '1') == '1' # Server-Timing header, and the slow-request log below
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500)) # requests slower than this are logged at WARNING with their costliest SQL
+    REQUEST_LOG = os.getenv('REQUEST_LOG', '0') == '1' # also log every request as a JSON line at INFO
+    METRICS_DIR = os.getenv('METRICS_DIR') # shared directory for multi-worker /metrics; unset = this process only
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1)) # seconds between a worker's snapshot writes
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN') # lets a scraper read /metrics with "Authorization: Bearer <token>"
@@ -0,0 +1,25 @@
+"""Add (account_id, date, id) index on Spending for paged history
+
+Revision ID: 0c6e2b9a4d17
+Revises: f2a7d4c8e913
+Create Date: 2026-10-18 18:05:41.772903
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6e2b9a4d17'
+down_revision = 'f2a7d4c8e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('spending', schema=None) as batch_op:
+        batch_op.create_index('ix_spending_account_date_id', ['account_id', 'date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('spending', schema=None) as batch_op:
+        batch_op.drop_index('ix_spending_account_date_id')
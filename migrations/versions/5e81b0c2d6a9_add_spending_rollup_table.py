@@ -0,0 +1,55 @@
+"""Add spending_rollup table
+
+Revision ID: 5e81b0c2d6a9
+Revises: c3d9a1f4b7e2
+Create Date: 2026-10-18 11:02:17.530914
+
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e81b0c2d6a9'
+down_revision = 'c3d9a1f4b7e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rollup = op.create_table('spending_rollup',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('period_type', sa.String(length=5), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'period_type', 'period_start')
+    )
+
+    # backfill from existing spending: group per day in SQL, build weeks (Monday start) and months from those.
+    # Same logic as app.services.spending_rollup.rebuild_rollups, inlined so the migration doesn't depend on app code.
+    rows = op.get_bind().execute(sa.text(
+        "SELECT account_id, date AS day, SUM(amount) AS total, COUNT(id) AS count FROM spending "
+        "WHERE date IS NOT NULL GROUP BY account_id, date"
+    ).columns(account_id=sa.Integer, day=sa.Date, total=sa.Float, count=sa.Integer)) # typed so SQLite returns real dates
+    merged = defaultdict(lambda: [0.0, 0])
+    for account_id, day, total, count in rows:
+        for period_type, start in (('day', day),
+                                   ('week', day - timedelta(days=day.weekday())),
+                                   ('month', day.replace(day=1))):
+            merged[(account_id, period_type, start)][0] += total
+            merged[(account_id, period_type, start)][1] += count
+
+    if merged:
+        op.bulk_insert(rollup, [
+            {'account_id': account_id, 'period_type': period_type, 'period_start': start, 'total': total, 'count': count}
+            for (account_id, period_type, start), (total, count) in merged.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('spending_rollup')
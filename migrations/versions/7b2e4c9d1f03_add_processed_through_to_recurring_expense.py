@@ -0,0 +1,26 @@
+"""Add processed_through watermark to RecurringExpense
+
+Revision ID: 7b2e4c9d1f03
+Revises: 5e81b0c2d6a9
+Create Date: 2026-10-18 12:20:44.804217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e4c9d1f03'
+down_revision = '5e81b0c2d6a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recurring_expense', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('processed_through', sa.Date(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('recurring_expense', schema=None) as batch_op:
+        batch_op.drop_column('processed_through')
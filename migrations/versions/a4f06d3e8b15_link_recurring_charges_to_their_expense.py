@@ -0,0 +1,75 @@
+"""Link recurring charges to their RecurringExpense with a unique period key
+
+Revision ID: a4f06d3e8b15
+Revises: 7b2e4c9d1f03
+Create Date: 2026-10-18 13:41:09.266718
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f06d3e8b15'
+down_revision = '7b2e4c9d1f03'
+branch_labels = None
+depends_on = None
+
+
+def _period_start(frequency, day):
+    if frequency == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if frequency == 'monthly':
+        return day.replace(day=1)
+    return day
+
+
+def upgrade():
+    with op.batch_alter_table('spending', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurring_expense_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('recurring_period_start', sa.Date(), nullable=True))
+        batch_op.create_foreign_key('fk_spending_recurring_expense_id', 'recurring_expense',
+                                    ['recurring_expense_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('ix_spending_recurring_period', ['recurring_expense_id', 'recurring_period_start'], unique=True)
+
+    # backfill: link existing "Recurring: <name>" charges to the expense with that name on the same account.
+    # Charges that can't be matched unambiguously (renamed or duplicate-named expenses) are left unlinked.
+    bind = op.get_bind()
+    expenses = bind.execute(sa.text(
+        "SELECT id, account_id, name, frequency FROM recurring_expense"
+    )).all()
+    by_name = {}
+    for expense_id, account_id, name, frequency in expenses:
+        key = (account_id, f"Recurring: {name}")
+        by_name[key] = None if key in by_name else (expense_id, frequency) # None marks a duplicate name
+
+    charges = bind.execute(sa.text(
+        "SELECT id, account_id, item, date AS day FROM spending WHERE item LIKE 'Recurring: %' AND date IS NOT NULL ORDER BY id"
+    ).columns(id=sa.Integer, account_id=sa.Integer, item=sa.String, day=sa.Date)).all()
+    links = []
+    taken = set()
+    for spending_id, account_id, item, day in charges:
+        match = by_name.get((account_id, item))
+        if not match:
+            continue
+        expense_id, frequency = match
+        period = _period_start(frequency, day)
+        if (expense_id, period) in taken:
+            continue # keep the unique index happy if an old double charge exists
+        taken.add((expense_id, period))
+        links.append({'spending_id': spending_id, 'expense_id': expense_id, 'period': period})
+
+    if links:
+        bind.execute(sa.text(
+            "UPDATE spending SET recurring_expense_id = :expense_id, recurring_period_start = :period WHERE id = :spending_id"
+        ), links)
+
+
+def downgrade():
+    with op.batch_alter_table('spending', schema=None) as batch_op:
+        batch_op.drop_index('ix_spending_recurring_period')
+        batch_op.drop_constraint('fk_spending_recurring_expense_id', type_='foreignkey')
+        batch_op.drop_column('recurring_period_start')
+        batch_op.drop_column('recurring_expense_id')
@@ -0,0 +1,33 @@
+"""Add saved_total running total to SavingsGoal
+
+Revision ID: c3d9a1f4b7e2
+Revises: 2a3ae768d439
+Create Date: 2026-10-18 10:12:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d9a1f4b7e2'
+down_revision = '2a3ae768d439'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('savings_goal', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('saved_total', sa.Float(), nullable=False, server_default='0'))
+
+    # backfill from the existing deposits
+    op.execute(
+        "UPDATE savings_goal SET saved_total = ("
+        "SELECT COALESCE(SUM(savings_deposit.amount), 0) FROM savings_deposit "
+        "WHERE savings_deposit.savings_goal_id = savings_goal.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('savings_goal', schema=None) as batch_op:
+        batch_op.drop_column('saved_total')
@@ -0,0 +1,26 @@
+"""Add version counter to Account for the dashboard cache
+
+Revision ID: d81c5a7e2f46
+Revises: a4f06d3e8b15
+Create Date: 2026-10-18 15:02:37.118920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81c5a7e2f46'
+down_revision = 'a4f06d3e8b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,36 @@
+"""Add shared stock price store
+
+Revision ID: e5b93f1a7c20
+Revises: d81c5a7e2f46
+Create Date: 2026-10-18 15:48:12.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b93f1a7c20'
+down_revision = 'd81c5a7e2f46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_symbol',
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+    op.create_table('stock_price',
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['symbol'], ['stock_symbol.symbol'], ),
+    sa.PrimaryKeyConstraint('symbol', 'date')
+    )
+
+
+def downgrade():
+    op.drop_table('stock_price')
+    op.drop_table('stock_symbol')
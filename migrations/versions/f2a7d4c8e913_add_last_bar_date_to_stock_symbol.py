@@ -0,0 +1,27 @@
+"""Add last_bar_date to StockSymbol for incremental history sync
+
+Revision ID: f2a7d4c8e913
+Revises: e5b93f1a7c20
+Create Date: 2026-10-18 16:31:55.067314
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7d4c8e913'
+down_revision = 'e5b93f1a7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # left null: symbols stored so far only have six months of prices, so their next refresh loads the full history
+    with op.batch_alter_table('stock_symbol', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_bar_date', sa.Date(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('stock_symbol', schema=None) as batch_op:
+        batch_op.drop_column('last_bar_date')
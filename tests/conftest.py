@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from app import bcrypt, create_app, db
+from app.models import User, Account
+from app.services import stock_prices
+from config import Config
+
+PASSWORD = "password"
+
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = "test"
+    WTF_CSRF_ENABLED = False
+    ADMIN_EMAIL = "admin@example.com"
+    DASHBOARD_CACHE_BACKEND = "none" # every request builds its data, so query counts don't depend on test order
+    METRICS_DIR = None
+
+
+@pytest.fixture
+def app(tmp_path):
+    """a fresh app on its own SQLite file (a file, not :memory:, so requests and the stock fetch pool threads share it)"""
+    class Settings(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(Settings)
+    with app.app_context():
+        db.create_all()
+    return app # no app context left pushed: test client requests would share it, and with it flask.g and the session
+
+
+def make_account(email: str = "user@example.com", **fields) -> Account:
+    """a user with one account, committed; log in with PASSWORD"""
+    user = User(name="Test", email=email, password=bcrypt.generate_password_hash(PASSWORD).decode())
+    db.session.add(user)
+    db.session.flush()
+    account = Account(user_id=user.id, **{"current_balance": 5000.0, "min_balance_goal": 500.0,
+                                          "weekly_spending_limit": 0.0, "hourly_wage": 25.0,
+                                          "hours_per_week": 30.0, **fields})
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+def login(app, email: str = "user@example.com"):
+    client = app.test_client()
+    response = client.post("/login", data={"email": email, "password": PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+class FakeYahoo:
+    """
+    Local stand-in for the Yahoo chart API. Weekly bars for any symbol, with a per-symbol `latency`
+    (seconds, "default" for the rest) and per-symbol `modes`: "error" (HTTP 500), "nodata" (404 with
+    Yahoo's JSON error) or "malformed" (200 with a result missing its quotes). `calls` lists the symbols asked for.
+    """
+
+    def __init__(self):
+        self.latency = {"default": 0.0}
+        self.modes = {}
+        self.calls = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                symbol = url.path.rsplit("/", 1)[-1]
+                fake.calls.append(symbol)
+                time.sleep(fake.latency.get(symbol, fake.latency["default"]))
+                status, body = fake.respond(symbol, parse_qs(url.query))
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v8/finance/chart/{{symbol}}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, symbol: str, query: dict):
+        mode = self.modes.get(symbol)
+        if mode == "error":
+            return 500, {"error": "upstream trouble"}
+        if mode == "nodata":
+            return 404, {"chart": {"result": None, "error": {"code": "Not Found"}}}
+        if mode == "malformed":
+            return 200, {"chart": {"result": [{"timestamp": [0]}], "error": None}}
+
+        now = datetime.now(timezone.utc)
+        if "period1" in query:
+            start = datetime.fromtimestamp(int(query["period1"][0]), timezone.utc)
+        else:
+            start = now - timedelta(days=365)
+        stamps = []
+        while start <= now:
+            stamps.append(int(start.timestamp()))
+            start += timedelta(days=7)
+        closes = [100.0 + i for i in range(len(stamps))]
+        return 200, {"chart": {"result": [{"timestamp": stamps, "indicators": {"quote": [{"close": closes}]}}],
+                               "error": None}}
+
+    def count(self, symbol: str) -> int:
+        return self.calls.count(symbol)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def yahoo(app):
+    """
+    FakeYahoo wired into the app, with the stock service's per-process pool and breaker reset around the test.
+    The test runs inside an app context.
+    """
+    fake = FakeYahoo()
+    app.config.update(YAHOO_CHART_URL=fake.url, STOCK_FETCH_DEADLINE=5)
+    stock_prices._executor = None
+    stock_prices._breaker = None
+    stock_prices._in_flight.clear()
+    with app.app_context(): # the tests call the service directly
+        yield fake
+    if stock_prices._executor is not None:
+        stock_prices._executor.shutdown(wait=True) # let fetches that outlived their request finish with the app
+    stock_prices._executor = None
+    stock_prices._breaker = None
+    stock_prices._in_flight.clear()
+    fake.close()
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from app import db
+from app.calculations import BudgetManager
+from app.models import Account, Spending, SpendingRollup
+from tests.conftest import make_account
+
+TODAY = date(2026, 10, 18)
+
+
+def test_nested_batch_that_raises_is_undone_when_the_outer_batch_carries_on(app):
+    with app.app_context():
+        account_id = make_account(current_balance=100.0).id
+        bm = BudgetManager(db.session, account_id)
+
+        with bm.batch():
+            bm.make_personal_spend("Kept", 10.0, today=TODAY)
+            with pytest.raises(ValueError):
+                with bm.batch():
+                    bm.make_personal_spend("Undone", 20.0, today=TODAY)
+                    bm.make_personal_spend("Too much", 500.0, today=TODAY)
+            assert bm.account.current_balance == 90.0 # the next spend is checked against what's left
+            bm.make_personal_spend("Also kept", 5.0, today=TODAY)
+
+        db.session.expire_all()
+        assert db.session.get(Account, account_id).current_balance == 85.0
+        items = db.session.execute(select(Spending.item).where(Spending.account_id == account_id)).scalars().all()
+        assert sorted(items) == ["Also kept", "Kept"]
+        day = db.session.execute(select(SpendingRollup.total, SpendingRollup.count)
+                                 .where(SpendingRollup.account_id == account_id,
+                                        SpendingRollup.period_type == "day")).one()
+        assert tuple(day) == (15.0, 2)
+
+
+def test_outer_batch_that_raises_rolls_everything_back(app):
+    with app.app_context():
+        account_id = make_account(current_balance=100.0).id
+        bm = BudgetManager(db.session, account_id)
+
+        with pytest.raises(ValueError):
+            with bm.batch():
+                with bm.batch():
+                    bm.make_personal_spend("Inner", 20.0, today=TODAY)
+                bm.make_personal_spend("Too much", 500.0, today=TODAY)
+
+        db.session.expire_all()
+        assert db.session.get(Account, account_id).current_balance == 100.0
+        assert db.session.execute(select(Spending.id).where(Spending.account_id == account_id)).first() is None
+        assert db.session.execute(select(SpendingRollup.account_id)).first() is None
@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, select
+from app import db
+from app.models import RecurringExpense, SavingsDeposit, SavingsGoal, Spending
+from tests.conftest import login, make_account
+
+
+@contextmanager
+def count_queries(app):
+    """counts the statements run on the app's engine inside the block: `with count_queries(app) as queries: ...`"""
+    with app.app_context():
+        engine = db.engine
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def dashboard_queries(app, email: str) -> int:
+    client = login(app, email)
+    with count_queries(app) as queries:
+        assert client.get("/dashboard").status_code == 200
+    return queries[0]
+
+
+def test_dashboard_query_count_does_not_grow_with_recurring_expenses(app):
+    today = date.today()
+    with app.app_context():
+        for email, expenses in (("one@example.com", 1), ("many@example.com", 30)):
+            account = make_account(email, last_pay_credit=today) # paid today, so the view has no payday to credit
+            db.session.add_all(RecurringExpense(name=f"Expense {i}", amount=10.0, frequency="monthly",
+                                                processed_through=today, account_id=account.id)
+                               for i in range(expenses))
+            db.session.commit()
+
+    assert dashboard_queries(app, "one@example.com") == dashboard_queries(app, "many@example.com")
+
+
+def test_dashboard_query_count_does_not_grow_with_recurring_charges_due(app):
+    today = date.today()
+    with app.app_context():
+        for email, expenses in (("one@example.com", 1), ("many@example.com", 30)):
+            account = make_account(email, last_pay_credit=today)
+            db.session.add_all(RecurringExpense(name=f"Expense {i}", amount=10.0, frequency="daily",
+                                                processed_through=today - timedelta(days=3), account_id=account.id)
+                               for i in range(expenses)) # three days to catch up on, charged by the view
+            db.session.commit()
+
+    # not equal: the 3 charges of the one-expense account don't fill a spendings page, so each spendings list
+    # runs one more query to look for undated spendings to fill it with
+    assert dashboard_queries(app, "many@example.com") <= dashboard_queries(app, "one@example.com")
+    with app.app_context():
+        assert db.session.execute(select(func.count(Spending.id))).scalar() == 3 * 31 # the view charged them all
+
+
+def test_dashboard_query_count_does_not_grow_with_goals_and_deposits(app):
+    today = date.today()
+    with app.app_context():
+        for email, goals, deposits in (("one@example.com", 1, 1), ("many@example.com", 20, 10)):
+            account = make_account(email, last_pay_credit=today)
+            for i in range(goals):
+                goal = SavingsGoal(item=f"Goal {i}", cost=1000.0, purchased=i % 5 == 4, # some already bought
+                                   saved_total=25.0 * deposits, account_id=account.id)
+                goal.deposits = [SavingsDeposit(amount=25.0, date=today) for _ in range(deposits)]
+                db.session.add(goal)
+            db.session.commit()
+
+    assert dashboard_queries(app, "one@example.com") == dashboard_queries(app, "many@example.com")
@@ -0,0 +1,84 @@
+from sqlalchemy import event, update
+from app import db
+from app.calculations import BudgetManager
+from app.models import Account, SavingsDeposit, SavingsGoal
+from app.services.deposits import create_deposit, delete_deposit
+from tests.conftest import login, make_account
+
+
+def add_goal(cost: float = 100.0) -> tuple:
+    account_id = make_account().id
+    goal = SavingsGoal(item="Bike", cost=cost, account_id=account_id)
+    db.session.add(goal)
+    db.session.commit()
+    return account_id, goal.id
+
+
+def saved_total(goal_id: int) -> float:
+    db.session.expire_all()
+    return db.session.get(SavingsGoal, goal_id).saved_total
+
+
+def test_concurrent_deposits_both_count(app):
+    with app.test_request_context():
+        account_id, goal_id = add_goal()
+        db.session.get(SavingsGoal, goal_id).saved_total # loaded at 0 before the other deposit lands
+        raced = []
+
+        def other_deposit_first(conn, cursor, statement, *args):
+            # another request's 30.00 deposit commits after this one read the goal, before it writes anything
+            if statement.startswith(("INSERT", "UPDATE")) and not raced:
+                raced.append(True)
+                with db.engine.begin() as other:
+                    other.execute(update(SavingsGoal).where(SavingsGoal.id == goal_id)
+                                  .values(saved_total=SavingsGoal.saved_total + 30.0))
+
+        event.listen(db.engine, "before_cursor_execute", other_deposit_first)
+        try:
+            create_deposit(goal_id, 20.0)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", other_deposit_first)
+
+        assert saved_total(goal_id) == 50.0
+
+
+def test_deposits_in_one_batch_add_up_and_deleting_one_takes_it_off(app):
+    with app.test_request_context():
+        account_id, goal_id = add_goal()
+        bm = BudgetManager(db.session, account_id)
+        goal = db.session.get(SavingsGoal, goal_id)
+        with bm.batch():
+            bm.save_to_goal(goal, 10.0)
+            bm.save_to_goal(goal, 15.0)
+        assert saved_total(goal_id) == 25.0
+
+        delete_deposit(db.session.get(SavingsGoal, goal_id).deposits[0].id, account_id)
+        assert saved_total(goal_id) == 15.0
+
+
+def test_deposit_that_completes_the_goal_marks_it_purchased(app):
+    with app.test_request_context():
+        _, goal_id = add_goal(cost=40.0)
+        create_deposit(goal_id, 25.0)
+        create_deposit(goal_id, 25.0) # trimmed to the 15.00 still needed
+
+        goal = db.session.get(SavingsGoal, goal_id)
+        assert (goal.saved_total, goal.purchased) == (40.0, True)
+
+
+def test_deposit_can_be_removed_from_the_dashboard(app):
+    with app.test_request_context():
+        account_id, goal_id = add_goal()
+        create_deposit(goal_id, 20.0)
+        deposit_id = db.session.get(SavingsGoal, goal_id).deposits[0].id
+    client = login(app)
+
+    action = f'action="/dashboard/deposits/{deposit_id}/delete"'
+    assert action in client.get("/dashboard").get_data(as_text=True)
+    assert client.post(f"/dashboard/deposits/{deposit_id}/delete").status_code == 302
+
+    with app.app_context():
+        assert db.session.get(SavingsDeposit, deposit_id) is None
+        assert db.session.get(SavingsGoal, goal_id).saved_total == 0.0
+        assert db.session.get(Account, account_id).current_balance == 5000.0
+        assert action not in client.get("/dashboard").get_data(as_text=True)
@@ -0,0 +1,33 @@
+import logging
+
+from tests.conftest import login, make_account
+
+
+def request_log(app, caplog, **config) -> list:
+    app.config.update(config)
+    with app.app_context():
+        make_account()
+    client = login(app)
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="app.requests"):
+        response = client.get("/dashboard")
+    assert "Server-Timing" in response.headers
+    return [(record.levelname, record.getMessage()) for record in caplog.records if record.name == "app.requests"]
+
+
+def test_fast_requests_are_not_logged_by_default(app, caplog):
+    assert request_log(app, caplog) == []
+
+
+def test_request_log_logs_every_request_at_info(app, caplog):
+    lines = request_log(app, caplog, REQUEST_LOG=True)
+
+    assert [level for level, _ in lines] == ["INFO"]
+    assert '"endpoint": "dashboard.view"' in lines[0][1]
+
+
+def test_slow_requests_are_logged_at_warning_with_their_sql(app, caplog):
+    lines = request_log(app, caplog, SLOW_REQUEST_MS=0)
+
+    assert [level for level, _ in lines] == ["WARNING"]
+    assert '"statements": [' in lines[0][1]
@@ -0,0 +1,29 @@
+import gc
+
+from app import create_app, metrics
+from tests.conftest import TestConfig
+
+
+class CachedConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    DASHBOARD_CACHE_BACKEND = "memory"
+
+
+def test_fork_reset_does_not_keep_old_apps_caches_alive():
+    for _ in range(5):
+        create_app(CachedConfig)
+    gc.collect()
+
+    assert len(metrics._CACHES) <= 1 # only the last app's cache, which the metric functions still read
+
+
+def test_fork_reset_zeroes_the_registry_and_the_cache_stats():
+    app = create_app(CachedConfig)
+    cache = app.extensions["dashboard_cache"]
+    cache.hits, cache.misses = 3, 1
+    metrics.REQUESTS.inc(endpoint="main.home", method="GET", status=200)
+
+    metrics._reset_after_fork()
+
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert metrics.REQUESTS.samples() == []
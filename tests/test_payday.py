@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from sqlalchemy import update
+from app import db
+from app.models import Account
+from app.services import payday
+from tests.conftest import make_account
+
+FRIDAY = date(2026, 10, 16)
+
+
+def test_credits_every_due_account_once(app):
+    with app.app_context():
+        ids = [make_account(f"user{i}@example.com", last_pay_credit=FRIDAY - timedelta(days=14),
+                            hourly_wage=20.0, hours_per_week=10.0).id for i in range(3)]
+
+        stats = payday.credit_all_due_paydays(FRIDAY)
+        assert (stats["accounts_credited"], stats["cycles_credited"], stats["amount_credited"]) == (3, 6, 1200.0)
+        assert [db.session.get(Account, id).current_balance for id in ids] == [5400.0] * 3
+
+        assert payday.credit_all_due_paydays(FRIDAY)["accounts_credited"] == 0
+
+
+def test_accounts_credited_elsewhere_meanwhile_are_not_counted(app, monkeypatch):
+    with app.app_context():
+        raced, other = (make_account(f"user{i}@example.com", last_pay_credit=FRIDAY - timedelta(days=7),
+                                     hourly_wage=20.0, hours_per_week=10.0) for i in range(2))
+        raced_id = raced.id
+        due_pay_cycles = payday.due_pay_cycles
+
+        def credited_by_someone_else(last_pay_credit, *args):
+            # the dashboard credits this account after the chunk was read, before its UPDATE runs
+            if not getattr(credited_by_someone_else, "done", False):
+                credited_by_someone_else.done = True
+                db.session.execute(update(Account).where(Account.id == raced_id)
+                                   .values(last_pay_credit=FRIDAY, current_balance=Account.current_balance + 200))
+            return due_pay_cycles(last_pay_credit, *args)
+
+        monkeypatch.setattr(payday, "due_pay_cycles", credited_by_someone_else)
+        stats = payday.credit_all_due_paydays(FRIDAY)
+
+        assert (stats["accounts_credited"], stats["cycles_credited"], stats["amount_credited"]) == (1, 1, 200.0)
+        db.session.expire_all()
+        assert db.session.get(Account, raced_id).current_balance == 5200.0 # paid once, not twice
+        assert db.session.get(Account, other.id).current_balance == 5200.0
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, insert, select, update
+from app import db
+from app.models import Account, RecurringExpense, Spending, SpendingRollup
+from app.services.account import _upsert_collection
+from app.services.expense_processor import process_all_recurring_expenses
+from app.services.spending_rollup import rebuild_rollups
+from tests.conftest import make_account
+from tests.test_dashboard_queries import count_queries
+
+SUNDAY = date(2026, 10, 18)
+
+
+def add_accounts(count: int, balance: float = 5000.0) -> list:
+    """accounts with a daily and a weekly expense, processed up to a week before SUNDAY"""
+    ids = []
+    for i in range(count):
+        account = make_account(f"user{len(ids)}-{count}@example.com", current_balance=balance)
+        db.session.add_all([
+            RecurringExpense(name="Coffee", amount=3.0, frequency="daily",
+                             processed_through=SUNDAY - timedelta(days=7), account_id=account.id),
+            RecurringExpense(name="Rent", amount=50.0, frequency="weekly",
+                             processed_through=SUNDAY - timedelta(days=7), account_id=account.id),
+        ])
+        ids.append(account.id)
+    db.session.commit()
+    return ids
+
+
+def rollup_rows() -> list:
+    return sorted(db.session.execute(select(SpendingRollup.account_id, SpendingRollup.period_type,
+                                            SpendingRollup.period_start, func.round(SpendingRollup.total, 2),
+                                            SpendingRollup.count)).all())
+
+
+def test_chunk_query_count_does_not_grow_with_accounts(app):
+    counts = []
+    for accounts in (2, 20):
+        with app.app_context():
+            add_accounts(accounts)
+            with count_queries(app) as queries:
+                stats = process_all_recurring_expenses(SUNDAY, chunk_size=500)
+            assert stats["charges"] == accounts * 8 # 7 coffees and a Monday rent each
+            counts.append(queries[0])
+
+    assert counts[0] == counts[1]
+
+
+def test_rollups_match_a_rebuild_after_processing(app):
+    with app.app_context():
+        add_accounts(3)
+        process_all_recurring_expenses(SUNDAY)
+        process_all_recurring_expenses(SUNDAY + timedelta(days=9)) # second run adds to existing rollup rows
+        db.session.commit()
+        processed = rollup_rows()
+
+        rebuild_rollups()
+        assert rollup_rows() == processed
+
+
+def test_charge_skipped_for_insufficient_funds_is_retried(app):
+    with app.app_context():
+        account_id = add_accounts(1, balance=40.0)[0]
+
+        stats = process_all_recurring_expenses(SUNDAY)
+        assert (stats["charges"], stats["failures"]) == (7, 1) # rent doesn't fit after Monday's coffee
+        rent = RecurringExpense.query.filter_by(account_id=account_id, name="Rent").one()
+        assert rent.processed_through == date(2026, 10, 11) # held before the skipped Monday
+
+        db.session.get(Account, account_id).current_balance += 100
+        db.session.commit()
+        stats = process_all_recurring_expenses(SUNDAY)
+
+        assert (stats["charges"], stats["failures"]) == (1, 0)
+        charged = db.session.execute(select(Spending.date).where(Spending.account_id == account_id,
+                                                                  Spending.item == "Recurring: Rent")).scalars().all()
+        assert charged == [date(2026, 10, 12)]
+        assert db.session.get(RecurringExpense, rent.id).processed_through == SUNDAY
+
+
+def test_periods_charged_by_a_concurrent_run_are_skipped_not_a_crash(app):
+    with app.app_context():
+        account_id = add_accounts(1)[0]
+        rent_id = RecurringExpense.query.filter_by(account_id=account_id, name="Rent").one().id
+        monday = SUNDAY - timedelta(days=6)
+        raced = []
+
+        def dashboard_charges_rent_first(conn, cursor, statement, *args):
+            # a dashboard visit charges Monday's rent after this run read the charged periods, before it inserts
+            if statement.startswith("INSERT INTO spending ") and not raced:
+                raced.append(True)
+                with db.engine.begin() as other:
+                    other.execute(insert(Spending), {"item": "Recurring: Rent", "amount": 50.0, "date": monday,
+                                                     "account_id": account_id, "recurring_expense_id": rent_id,
+                                                     "recurring_period_start": monday})
+                    other.execute(update(Account).where(Account.id == account_id)
+                                  .values(current_balance=Account.current_balance - 50.0))
+
+        event.listen(db.engine, "before_cursor_execute", dashboard_charges_rent_first)
+        try:
+            stats = process_all_recurring_expenses(SUNDAY)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", dashboard_charges_rent_first)
+
+        assert (stats["charges"], stats["amount"]) == (7, 21.0) # the coffees; the rent was already charged
+        db.session.expire_all()
+        assert db.session.get(Account, account_id).current_balance == 5000.0 - 21.0 - 50.0 # rent debited once
+        rents = db.session.execute(select(func.count()).where(Spending.recurring_expense_id == rent_id)).scalar()
+        assert rents == 1
+
+
+def test_expense_removed_from_the_form_unlinks_its_charges(app):
+    with app.app_context():
+        account_id = add_accounts(1)[0]
+        process_all_recurring_expenses(SUNDAY)
+        account = db.session.get(Account, account_id)
+
+        _upsert_collection([], RecurringExpense, account) # both expenses removed in the form
+        db.session.commit()
+        linked = db.session.execute(select(func.count()).where(Spending.recurring_expense_id.is_not(None))).scalar()
+        assert linked == 0
+
+        # SQLite hands the freed id to the next expense; its periods mustn't look charged already
+        tea = RecurringExpense(name="Tea", amount=2.0, frequency="daily",
+                                  processed_through=SUNDAY - timedelta(days=7), account_id=account_id)
+        db.session.add(tea)
+        db.session.commit()
+        assert process_all_recurring_expenses(SUNDAY)["charges"] == 7
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+from app import db
+from app.models import Spending
+from tests.conftest import login, make_account
+
+
+def add_spendings(app) -> tuple:
+    """5 dated and 3 undated spendings; returns (dated ids newest first, undated ids newest first)"""
+    with app.app_context():
+        account = make_account()
+        dated = [Spending(item=f"Dated {i}", amount=10.0, date=date(2026, 10, 1) + timedelta(days=i % 3),
+                          account_id=account.id) for i in range(5)]
+        undated = [Spending(item=f"Undated {i}", amount=5.0, account_id=account.id) for i in range(3)]
+        db.session.add_all(dated + undated)
+        db.session.flush()
+        for spend in undated:
+            spend.date = None # the column default fills in today on insert
+        db.session.commit()
+        dated_ids = [s.id for s in sorted(dated, key=lambda s: (s.date, s.id), reverse=True)]
+        return dated_ids, [s.id for s in reversed(undated)]
+
+
+def walk(client, url: str) -> list:
+    """every page of /api/spendings from `url` on, as a list of pages of ids"""
+    pages = []
+    next_url = url
+    while next_url:
+        response = client.get(next_url)
+        assert response.status_code == 200
+        pages.append([spend["id"] for spend in response.json["spendings"]])
+        cursor = response.json["next"]
+        next_url = f"{url}&before={cursor}" if cursor else None
+    return pages
+
+
+def test_pages_run_through_dated_then_undated_spendings(app):
+    dated, undated = add_spendings(app)
+    client = login(app)
+
+    pages = walk(client, "/api/spendings?limit=2")
+
+    assert [id for page in pages for id in page] == dated + undated
+    assert pages[2] == [dated[4], undated[0]] # one page can hold both
+    assert pages[3] == undated[1:] # the cursor of an undated row pages on through the undated ones
+
+
+def test_date_range_leaves_out_undated_spendings(app):
+    dated, _ = add_spendings(app)
+    client = login(app)
+
+    pages = walk(client, "/api/spendings?limit=2&from=2026-01-01")
+
+    assert [id for page in pages for id in page] == dated
+
+
+def test_invalid_cursor_is_a_bad_request(app):
+    add_spendings(app)
+    client = login(app)
+
+    assert client.get("/api/spendings?before=null:x").status_code == 400
+    assert client.get("/api/spendings?before=yesterday:3").status_code == 400
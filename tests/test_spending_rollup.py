@@ -0,0 +1,62 @@
+from datetime import date
+
+from sqlalchemy import event, func, insert, select
+from app import db
+from app.models import Spending, SpendingRollup
+from app.services.spending_rollup import rebuild_rollups, record_spending, unrecord_spending
+from tests.conftest import make_account
+
+
+def rollup_rows(account_id: int) -> list:
+    return sorted(db.session.execute(
+        select(SpendingRollup.period_type, SpendingRollup.period_start, func.round(SpendingRollup.total, 2),
+               SpendingRollup.count)
+        .where(SpendingRollup.account_id == account_id, SpendingRollup.count != 0)
+    ).all())
+
+
+def test_undated_spendings_stay_out_of_the_rollups_like_a_rebuild(app):
+    with app.app_context():
+        account_id = make_account().id
+        for spend_date, amount in ((date(2026, 10, 12), 20.0), (None, 7.5)):
+            spend = Spending(item="Lunch", amount=amount, account_id=account_id)
+            db.session.add(spend)
+            db.session.flush()
+            spend.date = spend_date # set after the insert, or the column default fills in today
+            record_spending(account_id, spend_date, amount)
+        db.session.commit()
+
+        recorded = rollup_rows(account_id)
+        assert [(period, total) for period, _, total, _ in recorded] == [("day", 20.0), ("month", 20.0), ("week", 20.0)]
+        rebuild_rollups(account_id)
+        assert rollup_rows(account_id) == recorded
+
+        unrecord_spending(account_id, None, 7.5) # deleting the undated spending leaves the rollups alone
+        assert rollup_rows(account_id) == recorded
+
+
+def test_first_spending_of_a_period_added_by_two_writers_at_once(app):
+    with app.app_context():
+        account_id = make_account().id
+        day = date(2026, 10, 12)
+
+        raced = []
+
+        def other_writer_first(conn, cursor, statement, *args):
+            # the recurring job records a spending for the same day just before this INSERT reaches the database
+            if statement.startswith("INSERT INTO spending_rollup") and not raced:
+                raced.append(True)
+                with db.engine.begin() as other:
+                    other.execute(insert(SpendingRollup), [
+                        {"account_id": account_id, "period_type": period, "period_start": start, "total": 3.0, "count": 1}
+                        for period, start in (("day", day), ("week", day), ("month", day.replace(day=1)))])
+
+        event.listen(db.engine, "before_cursor_execute", other_writer_first)
+        try:
+            record_spending(account_id, day, 20.0)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", other_writer_first)
+
+        assert [(period, total, count) for period, _, total, count in rollup_rows(account_id)] == [
+            ("day", 23.0, 2), ("month", 23.0, 2), ("week", 23.0, 2)]
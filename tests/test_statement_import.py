@@ -0,0 +1,52 @@
+import io
+from datetime import date
+
+from sqlalchemy import select
+from app import db
+from app.models import Spending
+from app.services.statement_import import import_statement
+from tests.conftest import make_account
+
+STATEMENT = """date,description,amount
+2026-10-12,Coffee,3.50
+2026-10-12,Coffee,3.50
+2026-10-12,Groceries,42.10
+2026-10-13,Coffee,3.50
+"""
+
+
+def items(account_id: int) -> list:
+    return sorted(db.session.execute(select(Spending.date, Spending.item)
+                                     .where(Spending.account_id == account_id)).all())
+
+
+def test_repeated_line_is_a_second_purchase(app):
+    with app.app_context():
+        account_id = make_account().id
+
+        stats = import_statement(account_id, io.StringIO(STATEMENT))
+
+        assert (stats["imported"], stats["duplicates"]) == (4, 0)
+        assert [item for day, item in items(account_id) if item == "Coffee"] == ["Coffee"] * 3
+
+
+def test_reimport_adds_nothing_even_split_across_chunks(app):
+    with app.app_context():
+        account_id = make_account().id
+        import_statement(account_id, io.StringIO(STATEMENT))
+
+        stats = import_statement(account_id, io.StringIO(STATEMENT), chunk_size=1)
+
+        assert (stats["imported"], stats["duplicates"]) == (0, 4)
+        assert len(items(account_id)) == 4
+
+
+def test_overlapping_statement_adds_only_the_extra_copies(app):
+    with app.app_context():
+        account_id = make_account().id
+        import_statement(account_id, io.StringIO("date,description,amount\n2026-10-12,Coffee,3.50\n"))
+
+        stats = import_statement(account_id, io.StringIO(STATEMENT), chunk_size=1)
+
+        assert (stats["imported"], stats["duplicates"]) == (3, 1)
+        assert items(account_id).count((date(2026, 10, 12), "Coffee")) == 2 # both coffees of the 12th
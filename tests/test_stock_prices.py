@@ -0,0 +1,154 @@
+import threading
+import time
+from datetime import timedelta
+
+from app import db
+from app.models import StockSymbol
+from app.services import stock_prices
+from app.services.stock_prices import get_price_history
+from tests.conftest import login, make_account
+
+
+def test_symbols_are_fetched_concurrently(app, yahoo):
+    symbols = [f"S{i}" for i in range(6)]
+    yahoo.latency["default"] = 0.4
+
+    started = time.perf_counter()
+    result, _ = get_price_history(symbols)
+    elapsed = time.perf_counter() - started
+
+    assert all(result[symbol] for symbol in symbols)
+    assert elapsed < 1.5 # one after another would take 2.4s
+
+
+def test_duplicate_symbols_in_a_request_are_fetched_once(app, yahoo):
+    result, _ = get_price_history(["aapl", "AAPL", " aapl "])
+
+    assert result["aapl"] and result["AAPL"] == result["aapl"]
+    assert yahoo.count("AAPL") == 1
+
+
+def test_concurrent_requests_join_the_fetch_in_flight(app, yahoo):
+    yahoo.latency["AAPL"] = 0.5
+    futures = []
+
+    def fetch():
+        with app.app_context():
+            futures.append(stock_prices._fetch_coalesced("AAPL", None))
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(future) for future in futures}) == 1
+    futures[0].result(timeout=5)
+    assert yahoo.count("AAPL") == 1
+
+
+def test_deadline_returns_what_arrived_in_time(app, yahoo):
+    app.config["STOCK_FETCH_DEADLINE"] = 0.5
+    yahoo.latency["SLOW"] = 2
+
+    started = time.perf_counter()
+    result, _ = get_price_history(["SLOW", "FAST"])
+
+    assert time.perf_counter() - started < 1.5
+    assert result["FAST"]
+    assert "Timed out" in result["SLOW_error"]
+
+    # the slow fetch carries on in the background; asking again joins it rather than calling Yahoo twice
+    get_price_history(["SLOW"])
+    assert yahoo.count("SLOW") == 1
+
+
+def test_breaker_opens_after_consecutive_failures(app, yahoo):
+    app.config.update(STOCK_BREAKER_THRESHOLD=2, STOCK_BREAKER_COOLDOWN=60)
+    yahoo.modes.update({"X1": "error", "X2": "error"})
+
+    assert "X1_error" in get_price_history(["X1"])[0]
+    assert "X2_error" in get_price_history(["X2"])[0]
+
+    result, _ = get_price_history(["AAPL"])
+    assert "unavailable" in result["AAPL_error"]
+    assert yahoo.count("AAPL") == 0
+
+
+def _open_breaker(app, yahoo):
+    """open a breaker with no cooldown, so the next fetch is the half-open trial"""
+    app.config.update(STOCK_BREAKER_THRESHOLD=1, STOCK_BREAKER_COOLDOWN=0)
+    yahoo.modes["DOWN"] = "error"
+    get_price_history(["DOWN"])
+    assert stock_prices._breaker.is_open
+
+
+def test_breaker_closes_when_the_trial_finds_no_data(app, yahoo):
+    _open_breaker(app, yahoo)
+    yahoo.modes["GONE"] = "nodata"
+
+    result, _ = get_price_history(["GONE"])
+
+    assert "No data" in result["GONE_error"]
+    assert not stock_prices._breaker.is_open # Yahoo answered, so it's up
+    assert get_price_history(["AAPL"])[0]["AAPL"]
+
+
+def test_breaker_reopens_after_a_malformed_trial_and_tries_again(app, yahoo):
+    _open_breaker(app, yahoo)
+    yahoo.modes["BAD"] = "malformed"
+
+    assert "BAD_error" in get_price_history(["BAD"])[0]
+    assert stock_prices._breaker.is_open
+    assert not stock_prices._breaker.trial_running
+
+    # the trial didn't wedge the breaker: once the cooldown is over another trial goes through
+    assert get_price_history(["AAPL"])[0]["AAPL"]
+    assert not stock_prices._breaker.is_open
+
+
+def _a_day_later():
+    return stock_prices._utcnow() + timedelta(days=1) # past STOCK_CACHE_TTL, so what's stored is stale
+
+
+def test_stale_prices_are_served_at_once_and_refreshed_in_the_background(app, yahoo):
+    stored, stale = get_price_history(["AAPL"])
+    assert stored["AAPL"] and not stale
+    fetched_at = db.session.get(StockSymbol, "AAPL").fetched_at
+    yahoo.latency["AAPL"] = 1
+
+    started = time.perf_counter()
+    prices, stale = get_price_history(["AAPL"], now=_a_day_later())
+
+    assert time.perf_counter() - started < 0.5 # didn't wait for Yahoo
+    assert stale and prices["AAPL"][-1] == stored["AAPL"][-1] # the stored bars, not the refreshed ones
+    stock_prices._in_flight["AAPL"].result(timeout=5)
+    assert yahoo.count("AAPL") == 2
+    db.session.expire_all()
+    assert db.session.get(StockSymbol, "AAPL").fetched_at > fetched_at
+
+
+def test_stale_prices_are_served_while_the_breaker_is_open(app, yahoo):
+    app.config.update(STOCK_BREAKER_THRESHOLD=1, STOCK_BREAKER_COOLDOWN=60)
+    stored, _ = get_price_history(["AAPL"])
+    yahoo.modes["DOWN"] = "error"
+    get_price_history(["DOWN"])
+    assert stock_prices._breaker.is_open
+
+    prices, stale = get_price_history(["AAPL"], now=_a_day_later())
+
+    assert stale and prices["AAPL"][-1] == stored["AAPL"][-1]
+    assert yahoo.count("AAPL") == 1 # no call while the breaker is open
+
+
+def test_a_symbol_named_stale_keeps_its_prices(app, yahoo):
+    make_account()
+    client = login(app)
+    assert client.get("/stock-history-yahoo?symbol=stale").json["stale"]
+    db.session.get(StockSymbol, "STALE").fetched_at -= timedelta(days=1)
+    db.session.commit()
+
+    response = client.get("/stock-history-yahoo?symbol=stale")
+
+    assert response.headers["X-Prices-Stale"] == "true"
+    assert isinstance(response.json["stale"], list) and response.json["stale"]